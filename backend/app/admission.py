@@ -0,0 +1,113 @@
+"""
+Admission control for expensive (cache-miss) analyses.
+Bounded concurrency plus a bounded, deadline-limited wait queue; overflow is shed fast.
+"""
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Callable, Deque
+
+
+class Overloaded(Exception):
+    """Raised when a request can't be admitted; carries a Retry-After hint in seconds."""
+
+    def __init__(self, retry_after: int, reason: str):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Lets at most max_concurrent callers in; up to max_queue more wait up to queue_timeout."""
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self._max_concurrent = max_concurrent
+        self._max_queue = max_queue
+        self._queue_timeout = queue_timeout
+        self._active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        # EWMA of how long an admitted request holds its slot, for Retry-After
+        self._service_time = 5.0
+        self.rejected = 0
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """Rough seconds until a queue slot frees up."""
+        backlog = (len(self._waiters) + 1) / max(1, self._max_concurrent)
+        return max(1, math.ceil(backlog * self._service_time))
+
+    async def acquire(self) -> Callable[[], None]:
+        """Wait for a slot; returns an idempotent release function. Raises Overloaded."""
+        if self._active < self._max_concurrent and not self._waiters:
+            self._active += 1
+            return self._releaser()
+
+        if len(self._waiters) >= self._max_queue:
+            self.rejected += 1
+            raise Overloaded(self.retry_after(), "queue full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self._queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # A slot was handed over just as we gave up - pass it on
+                self._release()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.rejected += 1
+            raise Overloaded(self.retry_after(), "queue timeout") from None
+        return self._releaser()
+
+    def _releaser(self) -> Callable[[], None]:
+        started = time.monotonic()
+        released = False
+
+        def release():
+            nonlocal released
+            if released:
+                return
+            released = True
+            self._service_time = 0.9 * self._service_time + 0.1 * (time.monotonic() - started)
+            self._release()
+
+        return release
+
+    def _release(self):
+        """Hand the slot to the next live waiter, or free it."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+    @asynccontextmanager
+    async def slot(self):
+        """async with controller.slot(): ... - raises Overloaded if not admitted."""
+        release = await self.acquire()
+        try:
+            yield
+        finally:
+            release()
+
+
+# Shared controller for /analyze-startup and friends
+admission = AdmissionController(
+    max_concurrent=int(os.getenv("ADMISSION_MAX_CONCURRENT", "32")),
+    max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "64")),
+    queue_timeout=float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "10")),
+)
@@ -1,75 +1,406 @@
 """
 Simple in-memory caching for search results and AI responses.
 Uses TTL-based expiration to keep data fresh.
+
+Each cache is an in-process LRU (L1) optionally backed by a shared
+SQLite store (L2) so workers and restarts reuse each other's results.
 """
+import asyncio
 import hashlib
+import heapq
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
 import time
-from typing import Any, Dict, Optional, Tuple
+import zlib
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 from functools import wraps
 
+from .metrics import timed
+from .models import StartupAnalysis
+from .search_hits import SearchHit
+from .similarity import SimilarityIndex
+from .store import SQLiteStore, db_writer, open_store
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_key(text: str) -> str:
+    """Normalize and hash text to create a cache key."""
+    # Lowercase, strip whitespace, remove extra spaces
+    normalized = ' '.join(text.lower().split())
+    return hashlib.md5(normalized.encode()).hexdigest()
+
+
+def _estimate_size(value: Any) -> int:
+    """Rough deep size of a cached value in bytes."""
+    if isinstance(value, (str, bytes, int, float, bool)) or value is None:
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            _estimate_size(k) + _estimate_size(v) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(_estimate_size(v) for v in value)
+    if hasattr(value, "__slots__"):
+        return sys.getsizeof(value) + sum(
+            _estimate_size(getattr(value, slot, None)) for slot in value.__slots__
+        )
+    if hasattr(value, "__dict__"):
+        # Pydantic models and plain objects
+        return sys.getsizeof(value) + _estimate_size(vars(value))
+    return sys.getsizeof(value)
+
 
 class TTLCache:
-    """Simple TTL-based cache with max size."""
+    """LRU cache with per-entry TTL, size/byte limits and hit/miss stats.
+    
+    get/set are O(1) (plus O(log n) heap pushes); expired entries are
+    dropped lazily from an expiry heap instead of scanning the dict.
+    Thread-safe so it can be used from asyncio.to_thread workers.
+    
+    If an L2 store is given, sets are written through to it by the
+    background db_writer and L1 misses in aget/aget_stale fall back to it
+    in a thread; encode/decode convert values to and from bytes. The sync
+    get/get_stale only look at L1, so they never block the event loop.
     
-    def __init__(self, max_size: int = 100, ttl_seconds: int = 3600):
-        self._cache: Dict[str, Tuple[Any, float]] = {}
+    ttl_seconds is the soft TTL. With stale_ttl_seconds > 0 entries are kept
+    that much longer (the hard TTL) and get_stale() can still serve them,
+    flagged as stale, while the caller refreshes them in the background.
+    """
+    
+    def __init__(
+        self,
+        max_size: int = 100,
+        ttl_seconds: int = 3600,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Any], int]] = None,
+        l2: Optional[SQLiteStore] = None,
+        encode: Optional[Callable[[Any], bytes]] = None,
+        decode: Optional[Callable[[bytes], Any]] = None,
+        name: str = "cache",
+        stale_ttl_seconds: int = 0,
+    ):
+        # key -> (value, hard expiry, size); order is least -> most recently used
+        self._cache: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
         self._max_size = max_size
+        self._max_bytes = max_bytes
         self._ttl = ttl_seconds
+        self._stale_ttl = stale_ttl_seconds
+        self._sizeof = sizeof or _estimate_size
+        self._bytes = 0
+        self._l2 = l2
+        self._encode = encode
+        self._decode = decode
+        self._name = name
+        self.hits = 0
+        self.l2_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
     
     def _normalize_key(self, text: str) -> str:
         """Normalize and hash text to create a cache key."""
-        # Lowercase, strip whitespace, remove extra spaces
-        normalized = ' '.join(text.lower().split())
-        return hashlib.md5(normalized.encode()).hexdigest()
+        return normalize_key(text)
     
-    def _evict_expired(self):
-        """Remove expired entries."""
-        now = time.time()
-        expired = [k for k, (_, exp) in self._cache.items() if now > exp]
-        for k in expired:
-            del self._cache[k]
-    
-    def _evict_oldest(self):
-        """Remove oldest entries if cache is full."""
-        if len(self._cache) >= self._max_size:
-            # Remove 20% of oldest entries
-            sorted_items = sorted(self._cache.items(), key=lambda x: x[1][1])
-            to_remove = max(1, len(sorted_items) // 5)
-            for k, _ in sorted_items[:to_remove]:
-                del self._cache[k]
+    def _remove(self, cache_key: str):
+        """Drop an entry and release its bytes. Caller holds the lock."""
+        _, _, size = self._cache.pop(cache_key)
+        self._bytes -= size
+    
+    def _evict_expired(self, now: float):
+        """Pop expired entries off the expiry heap. Caller holds the lock."""
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            expiry, cache_key = heapq.heappop(heap)
+            entry = self._cache.get(cache_key)
+            # Skip heap records made stale by a later set() of the same key
+            if entry is not None and entry[1] == expiry:
+                self._remove(cache_key)
+                self.expirations += 1
+        # Rebuild if overwritten keys have left too many stale records behind
+        if len(heap) > 2 * len(self._cache) + 64:
+            self._expiry_heap = [(exp, k) for k, (_, exp, _) in self._cache.items()]
+            heapq.heapify(self._expiry_heap)
+    
+    def _evict_lru(self):
+        """Evict least recently used entries until within limits. Caller holds the lock."""
+        while self._cache and (
+            len(self._cache) > self._max_size
+            or (self._max_bytes is not None and self._bytes > self._max_bytes)
+        ):
+            cache_key = next(iter(self._cache))
+            self._remove(cache_key)
+            self.evictions += 1
     
     def get(self, key: str) -> Optional[Any]:
-        """Get value from cache if exists and not expired."""
-        self._evict_expired()
+        """Get value from L1 if it exists and is still fresh."""
+        with timed(f"{self._name}_cache_lookup"):
+            found = self._lookup_l1(key, allow_stale=False)[0]
+            if found is None:
+                self._miss(key)
+        return found[0] if found else None
+    
+    def get_stale(self, key: str) -> Optional[Tuple[Any, bool]]:
+        """Get (value, is_stale) from L1 for entries within the hard TTL, or None."""
+        with timed(f"{self._name}_cache_lookup"):
+            found = self._lookup_l1(key, allow_stale=True)[0]
+            if found is None:
+                self._miss(key)
+        return found
+    
+    async def aget(self, key: str) -> Optional[Any]:
+        """Like get(), falling back to L2 on a miss."""
+        found = await self._alookup(key, allow_stale=False)
+        return found[0] if found else None
+    
+    async def aget_stale(self, key: str) -> Optional[Tuple[Any, bool]]:
+        """Like get_stale(), falling back to L2 on a miss."""
+        return await self._alookup(key, allow_stale=True)
+    
+    async def _alookup(self, key: str, allow_stale: bool) -> Optional[Tuple[Any, bool]]:
+        with timed(f"{self._name}_cache_lookup"):
+            found, check_l2 = self._lookup_l1(key, allow_stale)
+            if found is None and check_l2 and self._l2 is not None:
+                # SQLite (and decoding) off the event loop
+                found = await asyncio.to_thread(self._get_l2, self._normalize_key(key), time.time())
+                if found is not None and (allow_stale or not found[1]):
+                    with self._lock:
+                        self.l2_hits += 1
+                    logger.debug("Cache L2 hit", extra={"cache": self._name, "key": key[:50], "stale": found[1]})
+                else:
+                    found = None
+            if found is None:
+                self._miss(key)
+        return found
+    
+    def _miss(self, key: str):
+        with self._lock:
+            self.misses += 1
+        logger.debug("Cache miss", extra={"cache": self._name, "key": key[:50]})
+    
+    def _lookup_l1(self, key: str, allow_stale: bool) -> Tuple[Optional[Tuple[Any, bool]], bool]:
+        """(value, is_stale) or None, plus whether L2 is worth asking."""
         cache_key = self._normalize_key(key)
+        now = time.time()
         
-        if cache_key in self._cache:
-            value, expiry = self._cache[cache_key]
-            if time.time() < expiry:
-                print(f"[Cache] HIT for key: {key[:50]}...")
-                return value
-            else:
-                del self._cache[cache_key]
+        with self._lock:
+            entry = self._cache.get(cache_key)
+            if entry is not None and now >= entry[1]:
+                self._remove(cache_key)
+                self.expirations += 1
+                entry = None
+            if entry is not None:
+                stale = now >= entry[1] - self._stale_ttl
+                if not stale or allow_stale:
+                    self._cache.move_to_end(cache_key)
+                    if stale:
+                        self.stale_hits += 1
+                    else:
+                        self.hits += 1
+                    logger.debug("Cache hit", extra={"cache": self._name, "key": key[:50], "stale": stale})
+                    return (entry[0], stale), False
         
-        print(f"[Cache] MISS for key: {key[:50]}...")
-        return None
+        # A stale L1 entry means L2 holds the same (stale) value - no need to look
+        return None, entry is None
+    
+    def _get_l2(self, cache_key: str, now: float) -> Optional[Tuple[Any, bool]]:
+        """Look up the shared tier and promote a hit into L1 with its remaining TTL (blocking)."""
+        if self._l2 is None:
+            return None
+        try:
+            row = self._l2.get(cache_key)
+            if row is None:
+                return None
+            value = self._decode(row[0])
+        except (sqlite3.Error, ValueError, zlib.error) as e:
+            logger.warning("Cache L2 read error: %s", e, extra={"cache": self._name})
+            return None
+        self._put(cache_key, value, row[1])
+        return value, now >= row[1] - self._stale_ttl
+    
+    def _put(self, cache_key: str, value: Any, expiry: float):
+        """Insert into L1 and enforce limits."""
+        size = self._sizeof(value) if self._max_bytes is not None else 0
+        with self._lock:
+            if cache_key in self._cache:
+                self._remove(cache_key)
+            self._cache[cache_key] = (value, expiry, size)
+            self._bytes += size
+            heapq.heappush(self._expiry_heap, (expiry, cache_key))
+            self._evict_expired(time.time())
+            self._evict_lru()
     
     def set(self, key: str, value: Any):
         """Store value in cache with TTL."""
-        self._evict_oldest()
         cache_key = self._normalize_key(key)
-        expiry = time.time() + self._ttl
-        self._cache[cache_key] = (value, expiry)
-        print(f"[Cache] SET for key: {key[:50]}...")
+        expiry = time.time() + self._ttl + self._stale_ttl
+        self._put(cache_key, value, expiry)
+        if self._l2 is not None:
+            db_writer.submit(self._set_l2, cache_key, value, expiry)
+        logger.debug("Cache set", extra={"cache": self._name, "key": key[:50]})
+    
+    def _set_l2(self, cache_key: str, value: Any, expiry: float):
+        """Encode and write one entry to the shared tier (runs on the writer thread)."""
+        try:
+            self._l2.set(cache_key, self._encode(value), expiry)
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning("Cache L2 write error: %s", e, extra={"cache": self._name})
+    
+    def attach_l2(self, store: Optional[SQLiteStore]):
+        """Back this cache with a shared store from now on (None leaves it L1-only)."""
+        self._l2 = store
     
     def clear(self):
         """Clear all cache entries."""
-        self._cache.clear()
+        with self._lock:
+            self._cache.clear()
+            self._expiry_heap.clear()
+            self._bytes = 0
+        if self._l2 is not None:
+            db_writer.submit(self._l2.clear)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Counters and occupancy for monitoring."""
+        with self._lock:
+            lookups = self.hits + self.l2_hits + self.stale_hits + self.misses
+            return {
+                "size": len(self._cache),
+                "max_size": self._max_size,
+                "bytes": self._bytes,
+                "max_bytes": self._max_bytes,
+                "hits": self.hits,
+                "l2_hits": self.l2_hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "hit_ratio": (lookups - self.misses) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+    
+    def __len__(self) -> int:
+        return len(self._cache)
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one in-flight task.
+    
+    The shared task is cancelled once every caller waiting on it has given up.
+    """
+    
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[asyncio.Task, int] = {}
+    
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn() once per normalized key; concurrent callers await the same result."""
+        flight_key = normalize_key(key)
+        task = self._inflight.get(flight_key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[flight_key] = task
+            task.add_done_callback(lambda done: self._forget(flight_key, done))
+        else:
+            logger.debug("Joined in-flight request", extra={"key": key[:50]})
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            # Shield so one caller giving up doesn't cancel the shared work
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+                if not task.done():
+                    # Nobody wants the result any more; later callers must start afresh,
+                    # not join a task that is being cancelled
+                    if self._inflight.get(flight_key) is task:
+                        del self._inflight[flight_key]
+                    task.cancel()
+    
+    def _forget(self, flight_key: str, task: asyncio.Task):
+        if self._inflight.get(flight_key) is task:
+            del self._inflight[flight_key]
+    
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+
+def _encode_search(value: List[SearchHit]) -> bytes:
+    return zlib.compress(json.dumps([hit.to_list() for hit in value], separators=(",", ":")).encode())
+
+
+def _decode_search(blob: bytes) -> List[SearchHit]:
+    return [SearchHit.from_list(values) for values in json.loads(zlib.decompress(blob))]
+
+
+def _encode_analysis(value: StartupAnalysis) -> bytes:
+    return zlib.compress(value.json_bytes())
+
+
+def _decode_analysis(blob: bytes) -> StartupAnalysis:
+    raw = zlib.decompress(blob)
+    analysis = StartupAnalysis.model_validate_json(raw)
+    # The stored bytes are already the response body
+    analysis._json = raw
+    return analysis
 
 
 # Global cache instances
-# Search cache: 1 hour TTL, max 100 entries
-search_cache = TTLCache(max_size=100, ttl_seconds=3600)
+# Search cache: 1 hour TTL, LRU-bounded by entry count and bytes
+search_cache = TTLCache(
+    max_size=int(os.getenv("SEARCH_CACHE_SIZE", "10000")),
+    ttl_seconds=3600,
+    max_bytes=int(os.getenv("SEARCH_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    # L2 rows are compact [title, url, domain, snippet] lists
+    encode=_encode_search,
+    decode=_decode_search,
+    name="search",
+)
+
+# Near-duplicate descriptions reuse each other's search results
+search_index = SimilarityIndex(
+    threshold=float(os.getenv("SEARCH_SIMILARITY_THRESHOLD", "0.8")),
+    max_entries=int(os.getenv("SEARCH_SIMILARITY_MAX_ENTRIES", "5000")),
+    min_tokens=int(os.getenv("SEARCH_SIMILARITY_MIN_TOKENS", "4")),
+)
+
+# Response cache: 30 min TTL (AI responses are larger), then served stale
+# for up to RESPONSE_CACHE_STALE_TTL more while a background refresh runs
+response_cache = TTLCache(
+    max_size=int(os.getenv("RESPONSE_CACHE_SIZE", "10000")),
+    ttl_seconds=1800,
+    stale_ttl_seconds=int(os.getenv("RESPONSE_CACHE_STALE_TTL", str(24 * 3600))),
+    max_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+    encode=_encode_analysis,
+    decode=_decode_analysis,
+    name="response",
+)
+
+_stores_lock = threading.Lock()
+_stores_opened = False
+
+
+def open_cache_stores():
+    """Attach the shared SQLite tier to the global caches (blocking, once per process).
+    
+    Done at startup rather than import, so importing the app never touches the filesystem.
+    """
+    global _stores_opened
+    with _stores_lock:
+        if _stores_opened:
+            return
+        search_cache.attach_l2(open_store("search_hits"))
+        response_cache.attach_l2(open_store("response"))
+        _stores_opened = True
+
 
-# Response cache: 30 min TTL, max 50 entries (AI responses are larger)
-response_cache = TTLCache(max_size=50, ttl_seconds=1800)
+# In-flight request coalescing for the same keys
+search_flight = SingleFlight()
+response_flight = SingleFlight()
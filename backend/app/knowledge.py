@@ -0,0 +1,186 @@
+"""
+Local competitor knowledge: an SQLite FTS5 index of every search hit and every
+competitor named in a roast. A new idea is scored against it first, so common
+categories are answered without calling DDGS.
+"""
+import asyncio
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import FrozenSet, Iterable, List, Optional, Tuple
+
+from .search_hits import SearchHit
+from .similarity import STOPWORDS, tokenize
+from .store import CACHE_DB_BUSY_TIMEOUT, db_writer, default_store_path
+
+logger = logging.getLogger(__name__)
+
+# Local results needed, and their mean share of the idea's words, to skip live search
+KNOWLEDGE_MIN_HITS = int(os.getenv("KNOWLEDGE_MIN_HITS", "5"))
+KNOWLEDGE_CONFIDENCE = float(os.getenv("KNOWLEDGE_CONFIDENCE", "0.6"))
+# Documents kept before the least recently seen are dropped
+KNOWLEDGE_MAX_DOCS = int(os.getenv("KNOWLEDGE_MAX_DOCS", "200000"))
+# Seconds between background trims down to KNOWLEDGE_MAX_DOCS
+KNOWLEDGE_PRUNE_INTERVAL = float(os.getenv("KNOWLEDGE_PRUNE_INTERVAL", "600"))
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+# Idea text remembered per document (recent ideas first)
+_IDEA_CHARS = 1000
+
+
+class CompetitorIndex:
+    """BM25-ranked full-text index of competitors, shared by all workers through one SQLite file.
+
+    All methods block; callers on the event loop use a thread or db_writer.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS competitor_docs (
+                id INTEGER PRIMARY KEY,
+                key TEXT NOT NULL UNIQUE,
+                title TEXT NOT NULL,
+                url TEXT NOT NULL,
+                domain TEXT NOT NULL,
+                snippet TEXT NOT NULL,
+                idea TEXT NOT NULL,
+                seen_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS competitor_docs_seen ON competitor_docs (seen_at);
+            CREATE VIRTUAL TABLE IF NOT EXISTS competitor_fts USING fts5(
+                title, snippet, idea,
+                content='competitor_docs', content_rowid='id', tokenize='porter unicode61'
+            );
+            CREATE TRIGGER IF NOT EXISTS competitor_docs_ai AFTER INSERT ON competitor_docs BEGIN
+                INSERT INTO competitor_fts (rowid, title, snippet, idea)
+                VALUES (new.id, new.title, new.snippet, new.idea);
+            END;
+            CREATE TRIGGER IF NOT EXISTS competitor_docs_ad AFTER DELETE ON competitor_docs BEGIN
+                INSERT INTO competitor_fts (competitor_fts, rowid, title, snippet, idea)
+                VALUES ('delete', old.id, old.title, old.snippet, old.idea);
+            END;
+            CREATE TRIGGER IF NOT EXISTS competitor_docs_au AFTER UPDATE ON competitor_docs BEGIN
+                INSERT INTO competitor_fts (competitor_fts, rowid, title, snippet, idea)
+                VALUES ('delete', old.id, old.title, old.snippet, old.idea);
+                INSERT INTO competitor_fts (rowid, title, snippet, idea)
+                VALUES (new.id, new.title, new.snippet, new.idea);
+            END;
+        """)
+
+    def _conn(self) -> sqlite3.Connection:
+        """Get (or open) this thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=CACHE_DB_BUSY_TIMEOUT, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add_hits(self, hits: Iterable[SearchHit], idea: str):
+        """Index search results that came up for an idea."""
+        rows = [(hit.url or hit.title, hit.title, hit.url, hit.domain, hit.snippet) for hit in hits]
+        self._upsert(rows, idea)
+
+    def add_competitors(self, names: Iterable[str], idea: str):
+        """Index competitor names from a roast of an idea."""
+        snippet = f"Named as a competitor of: {idea[:160]}"
+        rows = [(f"name:{name.lower()}", name, "", "", snippet) for name in names if name.strip()]
+        self._upsert(rows, idea)
+
+    def _upsert(self, rows: List[Tuple[str, str, str, str, str]], idea: str):
+        """Insert (key, title, url, domain, snippet) rows, or note another idea they came up for."""
+        if not rows:
+            return
+        self._conn().executemany(
+            """INSERT INTO competitor_docs (key, title, url, domain, snippet, idea, seen_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT (key) DO UPDATE SET
+                   idea = CASE WHEN instr(idea, excluded.idea) THEN idea
+                          ELSE substr(excluded.idea || ' | ' || idea, 1, ?) END,
+                   seen_at = excluded.seen_at""",
+            [(*row, idea, time.time(), _IDEA_CHARS) for row in rows],
+        )
+
+    def prune(self):
+        """Drop the least recently seen documents beyond KNOWLEDGE_MAX_DOCS."""
+        deleted = self._conn().execute(
+            "DELETE FROM competitor_docs WHERE id IN "
+            "(SELECT id FROM competitor_docs ORDER BY seen_at DESC LIMIT -1 OFFSET ?)",
+            (KNOWLEDGE_MAX_DOCS,),
+        ).rowcount
+        if deleted:
+            logger.info("Pruned competitor index", extra={"deleted": deleted})
+
+    def search(self, text: str, limit: int = 15) -> List[Tuple[SearchHit, FrozenSet[str]]]:
+        """Best BM25 matches for an idea (titles weigh double), each with the idea's words its own text covers.
+
+        Coverage counts the hit's title and snippet only, never the earlier idea
+        it came up for; competitor names (no URL) only cover their own name.
+        """
+        idea_words = tokenize(text)
+        terms = {w for w in _WORD_RE.findall(text.lower()) if w not in STOPWORDS and len(w) > 2}
+        if not idea_words or not terms:
+            return []
+        rows = self._conn().execute(
+            """SELECT d.title, d.url, d.domain, d.snippet
+               FROM competitor_fts JOIN competitor_docs d ON d.id = competitor_fts.rowid
+               WHERE competitor_fts MATCH ?
+               ORDER BY bm25(competitor_fts, 2.0, 1.0, 1.0) LIMIT ?""",
+            (" OR ".join(f'"{w}"' for w in sorted(terms)), limit),
+        ).fetchall()
+        return [
+            (
+                SearchHit(title, url, domain, snippet),
+                idea_words & tokenize(f"{title} {snippet}" if url else title),
+            )
+            for title, url, domain, snippet in rows
+        ]
+
+    def lookup(self, name: str, description: str) -> Optional[List[SearchHit]]:
+        """Local hits if they're good enough to skip live search, else None.
+
+        Scored on the description only; brand names rarely appear in past results.
+        Every word of the idea must show up in the best matches, so "math tutor"
+        results are never reused for a "chemistry tutor".
+        """
+        idea_words = tokenize(description)
+        matches = self.search(description)
+        if len(matches) < KNOWLEDGE_MIN_HITS:
+            return None
+        best = matches[:KNOWLEDGE_MIN_HITS]
+        if frozenset().union(*(covered for _, covered in best)) != idea_words:
+            return None
+        # Confidence: how much of the idea the best few matches cover, on average
+        confidence = sum(len(covered) for _, covered in best) / (len(best) * len(idea_words))
+        if confidence < KNOWLEDGE_CONFIDENCE:
+            return None
+        return [hit for hit, _ in matches]
+
+
+def open_competitor_index() -> Optional[CompetitorIndex]:
+    """The index in the shared cache database; None if disabled (CACHE_DB_PATH='') or unavailable.
+
+    Blocking (creates the tables on first use), so startup runs it in a thread.
+    """
+    path = default_store_path()
+    if not path:
+        return None
+    try:
+        return CompetitorIndex(path)
+    except sqlite3.Error as e:
+        logger.warning("Disabled competitor index (%s): %s", path, e)
+        return None
+
+
+async def prune_periodically(index: CompetitorIndex):
+    """Trim the index every KNOWLEDGE_PRUNE_INTERVAL seconds, on the writer thread."""
+    while True:
+        await asyncio.sleep(KNOWLEDGE_PRUNE_INTERVAL)
+        db_writer.submit(index.prune)
@@ -0,0 +1,192 @@
+"""
+Latency-aware routing across LLM models.
+Each model gets EWMA latency / error tracking and a circuit breaker; slow calls
+are hedged with a second request once they pass the model's recent p95.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Deque, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Comma-separated models, most preferred first (all served through OpenRouter)
+LLM_MODELS = [m.strip() for m in os.getenv("LLM_MODELS", "openai/gpt-4o-mini").split(",") if m.strip()]
+# Hedge delay (seconds) until a model has enough samples for a p95, and its floor
+LLM_HEDGE_DELAY = float(os.getenv("LLM_HEDGE_DELAY", "4"))
+LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "0.5"))
+# Upper bound on the share of calls that get a hedge, to cap the extra cost
+LLM_HEDGE_MAX_RATIO = float(os.getenv("LLM_HEDGE_MAX_RATIO", "0.1"))
+# Consecutive failures that open a model's circuit, and how long it stays open
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+
+_EWMA_ALPHA = 0.2
+_P95_MIN_SAMPLES = 20
+
+
+class NoModelAvailable(Exception):
+    """Every model's circuit breaker is open."""
+
+
+class ModelBackend:
+    """Health of one model: EWMA latency and error rate, recent latencies, breaker state."""
+
+    def __init__(self, model: str):
+        self.model = model
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.failures = 0  # consecutive
+        self.open_until = 0.0
+        self._probing = False
+        self._samples: Deque[float] = deque(maxlen=200)
+
+    @property
+    def circuit_open(self) -> bool:
+        return self.failures >= LLM_BREAKER_FAILURES
+
+    def available(self, now: float) -> bool:
+        """Closed, or half-open with no trial call in flight yet."""
+        if not self.circuit_open:
+            return True
+        return now >= self.open_until and not self._probing
+
+    def score(self) -> float:
+        """Lower is better; untried models score 0 so they get sampled."""
+        return (self.latency or 0.0) * (1 + 4 * self.error_rate)
+
+    def p95(self) -> Optional[float]:
+        if len(self._samples) < _P95_MIN_SAMPLES:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def begin(self):
+        if self.circuit_open:
+            # Half-open: this call is the single trial
+            self._probing = True
+
+    def observe(self, seconds: float):
+        """Record how long a completed call took."""
+        self._samples.append(seconds)
+        self.latency = seconds if self.latency is None else (1 - _EWMA_ALPHA) * self.latency + _EWMA_ALPHA * seconds
+
+    def record_success(self, seconds: float):
+        self.observe(seconds)
+        self.error_rate *= 1 - _EWMA_ALPHA
+        if self.circuit_open:
+            logger.info("LLM circuit closed", extra={"model": self.model})
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self.error_rate = (1 - _EWMA_ALPHA) * self.error_rate + _EWMA_ALPHA
+        self.failures += 1
+        self._probing = False
+        if self.circuit_open:
+            self.open_until = time.monotonic() + LLM_BREAKER_COOLDOWN
+            if self.failures == LLM_BREAKER_FAILURES:
+                logger.warning("LLM circuit opened", extra={"model": self.model})
+
+    def abandon(self, seconds: float):
+        """A call was cancelled (lost a hedge race or the client left).
+
+        Its duration is only a lower bound on the real latency, so it is never
+        a sample; it can only pull an estimate that is already lower up.
+        """
+        if self.latency is not None and seconds > self.latency:
+            self.latency = (1 - _EWMA_ALPHA) * self.latency + _EWMA_ALPHA * seconds
+        self._probing = False
+
+
+class ModelRouter:
+    """Routes each call to the healthiest model and hedges calls that run past p95."""
+
+    def __init__(self, models: List[str]):
+        self.backends = [ModelBackend(m) for m in models]
+        self._hedge_ratio = 0.0
+        self.hedges = 0
+
+    def ranked(self) -> List[ModelBackend]:
+        """Available models, best first (ties keep the configured order)."""
+        now = time.monotonic()
+        return sorted((b for b in self.backends if b.available(now)), key=ModelBackend.score)
+
+    def hedge_delay(self, backend: ModelBackend) -> float:
+        p95 = backend.p95()
+        return max(LLM_HEDGE_MIN_DELAY, LLM_HEDGE_DELAY if p95 is None else p95)
+
+    @asynccontextmanager
+    async def using(self, backend: ModelBackend):
+        """Track one call's outcome against a backend's stats and breaker."""
+        backend.begin()
+        start = time.perf_counter()
+        try:
+            yield backend.model
+        except (asyncio.CancelledError, GeneratorExit):
+            backend.abandon(time.perf_counter() - start)
+            raise
+        except Exception:
+            backend.record_failure()
+            raise
+        backend.record_success(time.perf_counter() - start)
+
+    async def call(self, attempt: Callable[[str], Awaitable[T]]) -> T:
+        """Run attempt(model) on the best model, hedging or failing over to the next one.
+
+        The first attempt to return wins; an attempt that raises (including
+        invalid output) counts as a failure for its model.
+        """
+        candidates = self.ranked()
+        if not candidates:
+            raise NoModelAvailable("all LLM circuits are open")
+        primary = candidates[0]
+        # With a single model, hedging re-sends to it (OpenRouter may pick another provider)
+        backup = candidates[1] if len(candidates) > 1 else primary
+
+        async def run(backend: ModelBackend) -> T:
+            async with self.using(backend) as model:
+                return await attempt(model)
+
+        tasks = {asyncio.create_task(run(primary))}
+        hedge_at = time.monotonic() + self.hedge_delay(primary)
+        second_sent = False
+        hedged = False
+        error: Optional[BaseException] = None
+        try:
+            while tasks:
+                timeout = None if second_sent else max(0.0, hedge_at - time.monotonic())
+                done, tasks = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+                if second_sent:
+                    continue
+                if not tasks:
+                    # Primary failed outright - fail over without waiting
+                    if backup is primary and not backup.available(time.monotonic()):
+                        break
+                    second_sent = True
+                    tasks.add(asyncio.create_task(run(backup)))
+                elif not done and self._hedge_ratio < LLM_HEDGE_MAX_RATIO:
+                    second_sent = hedged = True
+                    self.hedges += 1
+                    logger.debug("Hedging LLM call", extra={"model": primary.model, "backup": backup.model})
+                    tasks.add(asyncio.create_task(run(backup)))
+                else:
+                    # Over the hedge budget: just keep waiting on the primary
+                    second_sent = True
+        finally:
+            for task in tasks:
+                task.cancel()
+            self._hedge_ratio = 0.99 * self._hedge_ratio + 0.01 * hedged
+        raise error
+
+
+llm_router = ModelRouter(LLM_MODELS)
@@ -0,0 +1,114 @@
+"""
+Non-blocking structured logging for the app.
+Records go onto an in-memory queue; a background listener thread does the I/O.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+# Attributes every LogRecord has; anything else came from extra={...}
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener: Optional[QueueListener] = None
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, including any extra={...} fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SampleFilter(logging.Filter):
+    """Keep only a fraction of records at or below a level; higher levels always pass."""
+
+    def __init__(self, rate: float, max_level: int = logging.DEBUG):
+        super().__init__()
+        self._rate = rate
+        self._max_level = max_level
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > self._max_level or random.random() < self._rate
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full."""
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Keep extras intact for the JSON formatter; only flatten the message and traceback
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+
+def setup_logging() -> logging.Logger:
+    """Route the "app" logger through a queue to a background writer thread (idempotent)."""
+    global _listener
+    logger = logging.getLogger("app")
+    if _listener is not None:
+        return logger
+
+    log_level = os.getenv("LOG_LEVEL", "INFO").upper()
+    log_format = os.getenv("LOG_FORMAT", "json")  # "json" or "text"
+    queue_size = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    # Fraction of high-frequency cache debug messages (hit/miss/set) that are kept
+    cache_sample_rate = float(os.getenv("CACHE_LOG_SAMPLE_RATE", "0.01"))
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    if log_format == "text":
+        formatter = logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    else:
+        formatter = JSONFormatter()
+    formatter.converter = time.gmtime
+    stream_handler.setFormatter(formatter)
+
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(queue_size)
+    logger.handlers = [DroppingQueueHandler(log_queue)]
+    logger.setLevel(log_level)
+    logger.propagate = False
+    cache_logger = logging.getLogger("app.cache")
+    cache_logger.filters = [SampleFilter(cache_sample_rate)]
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return logger
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -1,18 +1,131 @@
+import asyncio
+import json
+import logging
 import os
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Set
+from fastapi import APIRouter, FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 from dotenv import load_dotenv
 
-from .models import StartupInput, StartupAnalysis, HealthResponse
-from .roaster import StartupRoaster, EXAMPLE_ROASTS
-
-# Load environment variables
+# Load environment variables before the app modules read their settings
 load_dotenv()
 
-# Initialize FastAPI app
-app = FastAPI(
-    title="🗑️ Is My Startup Trash?",
-    description="""
+from .logging_config import setup_logging, shutdown_logging
+
+setup_logging()
+
+from . import metrics
+from .admission import Overloaded, admission
+from .cache import normalize_key, open_cache_stores, response_cache, search_cache, response_flight, search_flight
+from .llm_router import llm_router
+from .models import StartupInput, StartupAnalysis, HealthResponse, StatsResponse
+from .responses import JSONPayload, json_response
+from .roaster import StartupRoaster, EXAMPLE_ROASTS, preload_sdks
+from .stats import roast_stats, snapshot_stats, stats_db_path
+from .knowledge import open_competitor_index, prune_periodically
+from .store import db_writer
+from .warmer import WARM_ON_STARTUP, WARM_TOP_K, popularity, warm_caches
+
+logger = logging.getLogger(__name__)
+
+# Batch endpoint limits
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+BATCH_SEARCH_CONCURRENCY = int(os.getenv("BATCH_SEARCH_CONCURRENCY", "4"))
+BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "8"))
+
+# How long browsers / CDNs may reuse a roast or the example list (seconds)
+ROAST_CACHE_MAX_AGE = int(os.getenv("ROAST_CACHE_MAX_AGE", "300"))
+EXAMPLES_CACHE_MAX_AGE = int(os.getenv("EXAMPLES_CACHE_MAX_AGE", "60"))
+
+# Seconds a /analyze-startup request may take before it's cancelled with a 504
+REQUEST_DEADLINE = float(os.getenv("REQUEST_DEADLINE", "60"))
+
+# Roasters of every app running in this process, for the process-wide metrics
+running_roasters: Set[StartupRoaster] = set()
+
+router = APIRouter()
+
+
+def open_stores():
+    """Open the shared SQLite cache tier and competitor index (blocking DDL, so run in a thread)."""
+    open_cache_stores()
+    return open_competitor_index()
+
+
+async def start_roaster(app: FastAPI, openrouter_key: str, background: List[asyncio.Task]):
+    """Import the SDKs and open the stores off the event loop, build the roaster, then warm its caches."""
+    try:
+        await asyncio.to_thread(preload_sdks)
+        competitor_index = await asyncio.to_thread(open_stores)
+        roaster = StartupRoaster(openrouter_key, competitor_index=competitor_index)
+    except Exception as e:
+        logger.exception("Could not start the roaster, serving demo roasts: %s", e)
+        return
+    app.state.roaster = roaster
+    running_roasters.add(roaster)
+    logger.info("Roaster ready")
+    if competitor_index is not None:
+        background.append(asyncio.create_task(prune_periodically(competitor_index)))
+    if WARM_ON_STARTUP:
+        # Examples first (the UI suggests them), then last run's most requested ideas
+        ideas = [(ex["name"], ex["description"]) for ex in EXAMPLE_ROASTS]
+        ideas += popularity.load_previous()[:WARM_TOP_K]
+        background.append(asyncio.create_task(warm_caches(roaster, ideas)))
+
+
+async def get_roaster(request: Request) -> Optional[StartupRoaster]:
+    """This app's roaster, waiting for it if it's still starting; None in demo mode."""
+    state = request.app.state
+    if state.roaster is None and state.roaster_starting is not None:
+        await asyncio.shield(state.roaster_starting)
+    return state.roaster
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the roaster in the background on startup, close it on shutdown.
+    
+    The app accepts requests right away: /health, /examples and demo mode
+    never wait, roast requests wait until the roaster is ready.
+    State lives on app.state, so several apps can run in one process.
+    """
+    setup_logging()
+    openrouter_key = os.getenv("OPENROUTER_API_KEY")
+    background = [asyncio.create_task(metrics.monitor_event_loop_lag())]
+    stats_path = stats_db_path()
+    if stats_path:
+        background.append(asyncio.create_task(snapshot_stats(stats_path)))
+    if openrouter_key:
+        app.state.roaster_starting = asyncio.create_task(start_roaster(app, openrouter_key, background))
+    try:
+        yield
+    finally:
+        if app.state.roaster_starting:
+            app.state.roaster_starting.cancel()
+            app.state.roaster_starting = None
+        for task in background:
+            task.cancel()
+        popularity.save()
+        if stats_path:
+            roast_stats.merge_into(stats_path)
+        roaster = app.state.roaster
+        if roaster:
+            running_roasters.discard(roaster)
+            await roaster.close()
+            app.state.roaster = None
+        # Let queued cache writes reach the shared database
+        await asyncio.to_thread(db_writer.flush)
+        shutdown_logging()
+
+
+def create_app() -> FastAPI:
+    """Build the FastAPI app. Cheap: the LLM and search SDKs load in the background on startup."""
+    app = FastAPI(
+        title="🗑️ Is My Startup Trash?",
+        description="""
 ## The Only Startup Advisor Honest Enough to Tell You the Truth
 
 Tired of yes-men VCs who ghost you after saying "interesting"? 
@@ -30,31 +143,50 @@ We'll tell you if your startup is trash in seconds.
 - **✨ Gold** - Actually innovative (rare, but it happens)
 
 *Built by founders who've heard enough "Uber for X" pitches to last a lifetime.*
-    """,
-    version="1.0.0",
-    docs_url="/docs",
-    redoc_url="/redoc"
-)
+        """,
+        version="1.0.0",
+        docs_url="/docs",
+        redoc_url="/redoc",
+        lifespan=lifespan
+    )
 
-# CORS middleware for frontend
-# CORS middleware for frontend
-allowed_origins = os.getenv("ALLOWED_ORIGINS", "http://localhost:5173").split(",")
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=allowed_origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+    # CORS middleware for frontend
+    allowed_origins = os.getenv("ALLOWED_ORIGINS", "http://localhost:5173").split(",")
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=allowed_origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.add_middleware(metrics.MetricsMiddleware)
+    app.include_router(router)
+    # Roaster is created on startup so its HTTP pool lives on the server's event loop
+    app.state.roaster = None
+    # Background start-up of the roaster (SDK imports, stores, clients); None in demo mode
+    app.state.roaster_starting = None
+    return app
 
-# Initialize roaster
-openrouter_key = os.getenv("OPENROUTER_API_KEY")
-roaster = None
-if openrouter_key:
-    roaster = StartupRoaster(openrouter_key)
 
+metrics.register_caches({"search": search_cache, "response": response_cache})
+metrics.register_in_flight(
+    "singleflight_in_flight",
+    "Distinct searches / analyses currently running (after coalescing).",
+    {"search": lambda: len(search_flight), "analysis": lambda: len(response_flight)},
+)
+metrics.register_in_flight(
+    "pool_in_flight",
+    "Searches running on the search pool, and LLM calls finishing after their caller left.",
+    {
+        "search": lambda: sum(r.search_jobs for r in running_roasters),
+        "llm_detached": lambda: sum(r.detached_calls for r in running_roasters),
+    },
+)
+metrics.register_admission(admission)
+metrics.register_llm_router(llm_router)
 
-@app.get("/", response_model=HealthResponse, tags=["Health"])
+
+@router.get("/", response_model=HealthResponse, tags=["Health"])
 async def root():
     """Health check and welcome message."""
     return HealthResponse(
@@ -64,18 +196,36 @@ async def root():
     )
 
 
-@app.get("/health", response_model=HealthResponse, tags=["Health"])
-async def health_check():
+@router.get("/health", response_model=HealthResponse, tags=["Health"])
+async def health_check(request: Request):
     """Detailed health check."""
-    return HealthResponse(
-        status="healthy" if roaster else "degraded",
-        message="AI roaster ready" if roaster else "Running without OpenRouter (demo mode)",
-        version="1.0.0"
+    state = request.app.state
+    if state.roaster:
+        status, message = "healthy", "AI roaster ready"
+    elif state.roaster_starting and not state.roaster_starting.done():
+        status, message = "starting", "AI roaster warming up"
+    else:
+        status, message = "degraded", "Running without OpenRouter (demo mode)"
+    return HealthResponse(status=status, message=message, version="1.0.0")
+
+
+@router.get("/metrics", response_class=PlainTextResponse, tags=["Health"])
+async def get_metrics():
+    """Prometheus metrics: per-stage latency histograms, cache hit ratios, in-flight counts."""
+    return PlainTextResponse(
+        metrics.REGISTRY.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
     )
 
 
-@app.post("/analyze-startup", response_model=StartupAnalysis, tags=["Roast"])
-async def analyze_startup(startup: StartupInput):
+@router.get("/stats", response_model=StatsResponse, tags=["Health"])
+async def get_stats():
+    """Roasts generated so far (all workers on this host), verdict split and most-found competitors."""
+    return roast_stats.summary()
+
+
+@router.post("/analyze-startup", response_model=StartupAnalysis, tags=["Roast"])
+async def analyze_startup(startup: StartupInput, request: Request):
     """
     🔥 Analyze your startup idea and get brutally honest feedback.
     
@@ -96,59 +246,298 @@ async def analyze_startup(startup: StartupInput):
     - `gold` - Actually innovative (rare!)
     """
     
+    return await roast(request, startup.name, startup.description)
+
+
+@router.get("/analyze-startup", response_model=StartupAnalysis, tags=["Roast"])
+async def analyze_startup_get(
+    request: Request,
+    name: str = Query(..., min_length=1, max_length=100),
+    description: str = Query(..., min_length=10, max_length=1000),
+):
+    """
+    🔥 Same roast as `POST /analyze-startup`, as a cacheable GET.
+    
+    Responses carry an `ETag` and `Cache-Control`, so browsers and CDNs can
+    reuse them; send `If-None-Match` to get a `304` when nothing changed.
+    """
+    return await roast(request, name, description)
+
+
+class ClientDisconnected(Exception):
+    """The client went away before its response was ready."""
+
+
+async def wait_for_disconnect(request: Request):
+    """Return once the client has disconnected."""
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+
+
+async def run_for_client(request: Request, coro, deadline: float):
+    """Await coro, cancelling it if the client disconnects or the deadline passes.
+    
+    Raises ClientDisconnected or asyncio.TimeoutError in those cases.
+    """
+    work = asyncio.ensure_future(coro)
+    watcher = asyncio.ensure_future(wait_for_disconnect(request))
+    try:
+        await asyncio.wait({work, watcher}, timeout=deadline, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+        if not work.done():
+            work.cancel()
+    if work.done() and not work.cancelled():
+        return work.result()
+    if watcher.done() and not watcher.cancelled():
+        raise ClientDisconnected()
+    raise asyncio.TimeoutError()
+
+
+async def roast(request: Request, name: str, description: str):
+    """Shared body of the /analyze-startup routes."""
+    popularity.record(name, description)
+    
     # Use the AI roaster if available
+    roaster = await get_roaster(request)
     if roaster:
+        # Cheap cache hits skip admission control entirely
+        analysis = await roaster.cached_analysis(name, description)
+        # Only share cache hits; a fresh miss may be the uncached fallback roast
+        cache_control = f"public, max-age={ROAST_CACHE_MAX_AGE}" if analysis else "no-cache"
+        
+        async def analyze() -> StartupAnalysis:
+            async with admission.slot():
+                return await roaster.analyze_startup(name, description, check_cache=False)
+        
         try:
-            return await roaster.analyze_startup(startup.name, startup.description)
+            if analysis is None:
+                # Queued or running stages stop if the client leaves; a sent LLM call still gets cached
+                analysis = await run_for_client(request, analyze(), REQUEST_DEADLINE)
+        except Overloaded as e:
+            raise overloaded_error(e)
+        except ClientDisconnected:
+            # Nobody is listening; 499 is nginx's "client closed request"
+            return Response(status_code=499)
+        except asyncio.TimeoutError:
+            raise HTTPException(
+                status_code=504,
+                detail="Roasting your idea took too long. Try again in a moment."
+            )
         except Exception as e:
-            print(f"Roaster error: {e}")
+            logger.exception("Roaster error: %s", e)
             raise HTTPException(
                 status_code=500,
                 detail="Our AI is having a breakdown. Even it couldn't handle your startup idea."
             )
+        # Reuses the bytes serialized when the roast was first cached
+        payload = JSONPayload(analysis.json_bytes(), normalize_key(f"{name}:{description}"))
+        return json_response(request, payload, cache_control)
     else:
         # Demo mode - return random example
-        import random
-        example = random.choice(EXAMPLE_ROASTS)
-        return StartupAnalysis(
-            verdict=example["verdict"],
-            roast=f"[Demo Mode] {example['roast']}",
-            competitors=example["competitors"],
-            score=example["score"],
-            name_rating=example["name_rating"],
-            advice=example["advice"],
-            market_size=example.get("market_size"),
-            originality_score=example.get("originality_score"),
-            execution_difficulty=example.get("execution_difficulty")
+        return demo_analysis()
+
+
+@router.post("/analyze-startup/stream", tags=["Roast"])
+async def analyze_startup_stream(startup: StartupInput, request: Request):
+    """
+    🔥 Same roast as `/analyze-startup`, streamed as Server-Sent Events.
+    
+    **Events:**
+    - `competitors` - search results, as soon as the web search returns
+    - `delta` - `{"field": "roast" | "advice", "text": "..."}` as the AI writes it
+    - `result` - the final, validated analysis
+    - `error` - something went wrong; no `result` will follow
+    """
+    popularity.record(startup.name, startup.description)
+    
+    # Admit cache misses before the 200 goes out, so overload can still be a 503
+    release = None
+    cached = None
+    roaster = await get_roaster(request)
+    if roaster:
+        cached = await roaster.cached_analysis(startup.name, startup.description)
+        if cached is None:
+            try:
+                release = await admission.acquire()
+            except Overloaded as e:
+                raise overloaded_error(e)
+    
+    async def events():
+        try:
+            if cached is not None:
+                yield sse_event("result", cached.model_dump())
+            elif roaster:
+                stream = roaster.stream_analysis(startup.name, startup.description, check_cache=False)
+                async for event, data in stream:
+                    yield sse_event(event, data)
+            else:
+                yield sse_event("result", demo_analysis().model_dump())
+        except Exception as e:
+            logger.exception("Roaster stream error: %s", e)
+            yield sse_event("error", {
+                "detail": "Our AI is having a breakdown. Even it couldn't handle your startup idea."
+            })
+        finally:
+            if release:
+                release()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Also release if the client disconnects before the stream starts
+        background=BackgroundTask(release) if release else None
+    )
+
+
+@router.post("/analyze-startups", tags=["Roast"])
+async def analyze_startups(
+    startups: List[StartupInput],
+    request: Request,
+    max_concurrent_searches: int = Query(BATCH_SEARCH_CONCURRENCY, ge=1, le=32),
+    max_concurrent_llm: int = Query(BATCH_LLM_CONCURRENCY, ge=1, le=64),
+):
+    """
+    🔥 Roast a whole list of startup ideas in one request.
+    
+    Results stream back as NDJSON (one JSON object per line) in completion
+    order, so cached ideas arrive first. Each line has the `index` of the
+    input it answers plus either a `result` or an `error`. Duplicate ideas
+    are only analyzed once.
+    """
+    if len(startups) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large. We can only crush {BATCH_MAX_ITEMS} dreams per request."
         )
+    
+    roaster = await get_roaster(request)
+    
+    # Group duplicate ideas under the same normalized cache key
+    groups: Dict[str, List[int]] = {}
+    for index, startup in enumerate(startups):
+        key = normalize_key(f"{startup.name}:{startup.description}")
+        groups.setdefault(key, []).append(index)
+        popularity.record(startup.name, startup.description)
+    
+    search_slots = asyncio.Semaphore(max_concurrent_searches)
+    llm_slots = asyncio.Semaphore(max_concurrent_llm)
+    # Only ask for admission when the batch could actually use the slot
+    batch_slots = asyncio.Semaphore(max_concurrent_searches + max_concurrent_llm)
+    
+    async def run(indices: List[int]):
+        startup = startups[indices[0]]
+        try:
+            async with batch_slots, admission.slot():
+                analysis = await roaster.analyze_startup(
+                    startup.name, startup.description, search_slots, llm_slots, check_cache=False
+                )
+            return indices, {"cached": False, "result": analysis.model_dump()}
+        except Overloaded as e:
+            return indices, {"error": "Server overloaded, try again later.", "retry_after": e.retry_after}
+        except Exception as e:
+            logger.exception("Batch roaster error: %s", e)
+            return indices, {"error": "Our AI is having a breakdown. Even it couldn't handle this startup idea."}
+    
+    def lines(indices: List[int], payload: dict):
+        for index in indices:
+            yield json.dumps({"index": index, "name": startups[index].name, **payload}) + "\n"
+    
+    async def results():
+        tasks = []
+        try:
+            for indices in groups.values():
+                startup = startups[indices[0]]
+                if not roaster:
+                    for line in lines(indices, {"cached": False, "result": demo_analysis().model_dump()}):
+                        yield line
+                    continue
+                # Cache hits go out immediately, misses fan out
+                cached = await roaster.cached_analysis(startup.name, startup.description)
+                if cached is not None:
+                    for line in lines(indices, {"cached": True, "result": cached.model_dump()}):
+                        yield line
+                else:
+                    tasks.append(asyncio.create_task(run(indices)))
+            
+            for next_done in asyncio.as_completed(tasks):
+                indices, payload = await next_done
+                for line in lines(indices, payload):
+                    yield line
+        finally:
+            # Client went away - stop the remaining work
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(results(), media_type="application/x-ndjson")
 
 
-@app.get("/random-example", tags=["Examples"])
-async def get_random_example():
-    """Get a random example to try - each click gives a different startup idea."""
+def overloaded_error(e: Overloaded) -> HTTPException:
+    """503 with Retry-After for requests shed by admission control."""
+    return HTTPException(
+        status_code=503,
+        detail="Too many founders want to be roasted right now. Try again in a moment.",
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def demo_analysis() -> StartupAnalysis:
+    """Random canned roast for demo mode (no OpenRouter key)."""
     import random
     example = random.choice(EXAMPLE_ROASTS)
-    return {
-        "name": example["name"],
-        "description": example["description"]
-    }
+    return StartupAnalysis(
+        verdict=example["verdict"],
+        roast=f"[Demo Mode] {example['roast']}",
+        competitors=example["competitors"],
+        score=example["score"],
+        name_rating=example["name_rating"],
+        advice=example["advice"],
+        market_size=example.get("market_size"),
+        originality_score=example.get("originality_score"),
+        execution_difficulty=example.get("execution_difficulty")
+    )
+
+
+# Examples never change, so serialize them once at startup
+RANDOM_EXAMPLES = [
+    JSONPayload.from_obj({"name": ex["name"], "description": ex["description"]})
+    for ex in EXAMPLE_ROASTS
+]
+EXAMPLE_ITEMS = [
+    JSONPayload.from_obj({
+        "input": {"name": ex["name"], "description": ex["description"]},
+        "output": {k: v for k, v in ex.items() if k not in ["name", "description"]}
+    }).body
+    for ex in EXAMPLE_ROASTS
+]
+EXAMPLES_SUFFIX = JSONPayload.from_obj({
+    "total_examples": len(EXAMPLE_ROASTS),
+    "disclaimer": "These are just examples. Your actual roast will be unique."
+}).body[1:]
 
 
-@app.get("/examples", tags=["Examples"])
-async def get_examples():
+@router.get("/random-example", tags=["Examples"])
+async def get_random_example(request: Request):
+    """Get a random example to try - each click gives a different startup idea."""
+    import random
+    # no-cache: a CDN may keep a copy but must revalidate, so clicks stay random
+    return json_response(request, random.choice(RANDOM_EXAMPLES), "no-cache")
+
+
+@router.get("/examples", tags=["Examples"])
+async def get_examples(request: Request):
     """Get all example startup roasts for inspiration (or warning)."""
     import random
     # Return 3 random examples each time
-    selected = random.sample(EXAMPLE_ROASTS, min(3, len(EXAMPLE_ROASTS)))
-    return {
-        "examples": [
-            {
-                "input": {"name": ex["name"], "description": ex["description"]},
-                "output": {k: v for k, v in ex.items() if k not in ["name", "description"]}
-            }
-            for ex in selected
-        ],
-        "total_examples": len(EXAMPLE_ROASTS),
-        "disclaimer": "These are just examples. Your actual roast will be unique."
-    }
+    selected = random.sample(EXAMPLE_ITEMS, min(3, len(EXAMPLE_ITEMS)))
+    body = b'{"examples":[' + b",".join(selected) + b"]," + EXAMPLES_SUFFIX
+    return json_response(request, JSONPayload(body), f"public, max-age={EXAMPLES_CACHE_MAX_AGE}")
+
 
+app = create_app()
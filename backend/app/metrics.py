@@ -0,0 +1,275 @@
+"""
+Low-overhead in-process metrics rendered in Prometheus text format.
+Recording is a perf_counter() pair, a bisect and a short lock - a few microseconds.
+"""
+import asyncio
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+# Latency buckets in seconds: 100us (cache lookups) up to 60s (slow LLM calls)
+LATENCY_BUCKETS = (
+    0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Fixed-bucket histogram, one series per label combination."""
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self._labelnames = labelnames
+        self._buckets = tuple(buckets)
+        # labels -> [bucket counts..., +Inf count], sum
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        """Record one observation."""
+        index = bisect_left(self._buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = ([0] * (len(self._buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            snapshot = [(labels, list(counts), total[0]) for labels, (counts, total) in self._series.items()]
+        for labels, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self._buckets, counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                yield f"{self.name}_bucket{_format_labels(self._labelnames, labels, le)} {cumulative}"
+            cumulative += counts[-1]
+            le = 'le="+Inf"'
+            yield f"{self.name}_bucket{_format_labels(self._labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self._labelnames, labels)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self._labelnames, labels)} {cumulative}"
+
+
+class Counter:
+    """Monotonic counter, one series per label combination."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self._labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        with self._lock:
+            snapshot = list(self._values.items())
+        for labels, value in snapshot:
+            yield f"{self.name}{_format_labels(self._labelnames, labels)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """Value that goes up and down."""
+
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+
+class CallbackMetric:
+    """Gauge or counter whose series are read from a callback at scrape time."""
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...], fn: Callable[[], Dict[Tuple[str, ...], float]], kind: str = "gauge"):
+        self.name = name
+        self.help = help
+        self._labelnames = labelnames
+        self._fn = fn
+        self._kind = kind
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self._kind}"
+        for labels, value in self._fn().items():
+            yield f"{self.name}{_format_labels(self._labelnames, labels)} {_format_value(value)}"
+
+
+class Registry:
+    """Holds every metric and renders the /metrics payload."""
+
+    def __init__(self):
+        self._metrics: List[Any] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "roaster_stage_duration_seconds",
+    "Latency of each stage of a roast (cache lookup, search, prompt, LLM, decode, validation).",
+    ("stage",),
+))
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route and status class.",
+    ("path", "status"),
+))
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being served.",
+    ("path",),
+))
+EVENT_LOOP_LAG_SECONDS = REGISTRY.register(Histogram(
+    "event_loop_lag_seconds",
+    "How late the event loop ran a timer; high values mean something is blocking the loop.",
+))
+
+
+@contextmanager
+def timed(stage: str):
+    """Record the duration of the enclosed block under roaster_stage_duration_seconds."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage)
+
+
+async def monitor_event_loop_lag(interval: float = 0.25):
+    """Sleep in a loop and record how much later than requested each wakeup was."""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG_SECONDS.observe(max(0.0, loop.time() - start - interval))
+
+
+def register_caches(caches: Dict[str, Any]):
+    """Expose stats() of each named cache (hits, misses, ratio, size)."""
+    def series(field: str) -> Callable[[], Dict[Tuple[str, ...], float]]:
+        return lambda: {(name, ): cache.stats()[field] for name, cache in caches.items()}
+
+    for field, kind, help in (
+        ("hits", "counter", "In-memory (L1) cache hits."),
+        ("l2_hits", "counter", "Shared (L2) cache hits."),
+        ("stale_hits", "counter", "Stale entries served while a background refresh runs."),
+        ("misses", "counter", "Cache misses in both tiers."),
+        ("evictions", "counter", "Entries evicted to stay within size limits."),
+        ("expirations", "counter", "Entries dropped after their TTL."),
+        ("hit_ratio", "gauge", "Fraction of lookups served from either tier."),
+        ("size", "gauge", "Entries currently held in memory."),
+        ("bytes", "gauge", "Approximate bytes held in memory."),
+    ):
+        suffix = "_total" if kind == "counter" else ""
+        REGISTRY.register(CallbackMetric(f"cache_{field}{suffix}", help, ("cache",), series(field), kind))
+
+
+def register_in_flight(name: str, help: str, sources: Dict[str, Callable[[], int]]):
+    """Expose in-flight counts read from callables (e.g. single-flight tables)."""
+    REGISTRY.register(CallbackMetric(
+        name, help, ("kind",), lambda: {(kind, ): fn() for kind, fn in sources.items()}
+    ))
+
+
+def register_admission(controller):
+    """Expose admission-control occupancy and shed counts."""
+    REGISTRY.register(CallbackMetric(
+        "admission_active", "Cache-miss analyses currently admitted.", (), lambda: {(): controller.active}
+    ))
+    REGISTRY.register(CallbackMetric(
+        "admission_queued", "Cache-miss analyses waiting for a slot.", (), lambda: {(): controller.queued}
+    ))
+    REGISTRY.register(CallbackMetric(
+        "admission_rejected_total", "Requests shed with 503 (queue full or wait deadline).", (),
+        lambda: {(): controller.rejected}, "counter"
+    ))
+
+
+def register_llm_router(router):
+    """Expose per-model routing health and hedge counts."""
+    REGISTRY.register(CallbackMetric(
+        "llm_model_latency_ewma_seconds", "Smoothed LLM call latency per model.", ("model",),
+        lambda: {(b.model, ): b.latency for b in router.backends if b.latency is not None}
+    ))
+    REGISTRY.register(CallbackMetric(
+        "llm_model_error_rate", "Smoothed LLM call error rate per model.", ("model",),
+        lambda: {(b.model, ): b.error_rate for b in router.backends}
+    ))
+    REGISTRY.register(CallbackMetric(
+        "llm_circuit_open", "1 while a model's circuit breaker is open.", ("model",),
+        lambda: {(b.model, ): int(b.circuit_open) for b in router.backends}
+    ))
+    REGISTRY.register(CallbackMetric(
+        "llm_hedged_requests_total", "LLM calls that got a hedged second request.", (),
+        lambda: {(): router.hedges}, "counter"
+    ))
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency and in-flight requests."""
+
+    def __init__(self, app):
+        self.app = app
+        self._paths = None
+
+    def _path_label(self, scope) -> str:
+        # Only label known routes so random 404 paths can't blow up cardinality
+        if self._paths is None:
+            router = scope.get("app")
+            self._paths = {getattr(r, "path", None) for r in getattr(router, "routes", [])}
+        path = scope.get("path", "")
+        return path if path in self._paths else "other"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = self._path_label(scope)
+        status = ["5xx"]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = f"{message['status'] // 100}xx"
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc(path)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec(path)
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, path, status[0])
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from typing import Literal, List, Optional
 
 
@@ -62,6 +62,14 @@ class StartupAnalysis(BaseModel):
         None,
         description="How hard would this be to build"
     )
+    # Serialized form, kept so cache hits don't re-encode
+    _json: Optional[bytes] = PrivateAttr(default=None)
+    
+    def json_bytes(self) -> bytes:
+        """JSON body for this analysis, serialized once (analyses aren't mutated)."""
+        if self._json is None:
+            self._json = self.model_dump_json().encode()
+        return self._json
     
     model_config = {
         "json_schema_extra": {
@@ -0,0 +1,124 @@
+"""
+Host-wide token buckets for upstream calls (DDGS search, OpenRouter).
+Bucket state lives in a small file guarded by flock, so every uvicorn worker
+on the host draws from the same budget.
+"""
+import asyncio
+import logging
+import os
+import struct
+import tempfile
+import threading
+import time
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to a per-worker bucket
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Sustained requests/second and burst size per upstream, shared by all workers (0 = unlimited)
+SEARCH_RATE_LIMIT = float(os.getenv("SEARCH_RATE_LIMIT", "2"))
+SEARCH_RATE_BURST = float(os.getenv("SEARCH_RATE_BURST", "6"))
+LLM_RATE_LIMIT = float(os.getenv("LLM_RATE_LIMIT", "10"))
+LLM_RATE_BURST = float(os.getenv("LLM_RATE_BURST", "20"))
+# Longest an LLM call waits for a token (searches use their own deadline)
+LLM_RATE_LIMIT_WAIT = float(os.getenv("LLM_RATE_LIMIT_WAIT", "10"))
+# Seconds every worker backs off after an upstream says we're rate limited
+RATE_LIMIT_BACKOFF = float(os.getenv("RATE_LIMIT_BACKOFF", "5"))
+RATE_LIMIT_DIR = os.getenv("RATE_LIMIT_DIR", tempfile.gettempdir())
+
+# tokens, last refill (unix time)
+_STATE = struct.Struct("dd")
+
+
+class RateLimited(Exception):
+    """No token became available before the caller's deadline."""
+
+
+class SharedTokenBucket:
+    """Token bucket whose state is shared through a lock-protected file."""
+
+    def __init__(self, name: str, rate: float, burst: float, directory: str = RATE_LIMIT_DIR):
+        self.name = name
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._path = os.path.join(directory, f"is-my-startup-trash-{name}.bucket")
+        self._fd: Optional[int] = None
+        self._pid = 0
+        # Used when fcntl is missing or the file can't be opened
+        self._local = [self.burst, time.time()]
+        self._lock = threading.Lock()
+
+    def _file(self) -> Optional[int]:
+        """This process's descriptor for the state file (None if unavailable)."""
+        if fcntl is None:
+            return None
+        if self._fd is None or self._pid != os.getpid():
+            try:
+                self._fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o600)
+                self._pid = os.getpid()
+            except OSError as e:
+                logger.warning("Rate limiter %s is per-worker only (%s): %s", self.name, self._path, e)
+                self._fd = None
+                return None
+        return self._fd
+
+    def _update(self, cost: float, force: bool = False) -> float:
+        """Refill, then take cost tokens if there are enough (or always, going into debt, if force).
+
+        Returns 0 on success, else seconds until enough tokens will be there.
+        The file lock is held for a read and a write, so this is cheap enough for the event loop.
+        """
+        fd = self._file()
+        with self._lock:
+            if fd is None:
+                tokens, wait = self._take(self._local[0], self._local[1], cost, force)
+                self._local = [tokens, time.time()]
+                return wait
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                raw = os.pread(fd, _STATE.size, 0)
+                state = _STATE.unpack(raw) if len(raw) == _STATE.size else (self.burst, time.time())
+                tokens, wait = self._take(state[0], state[1], cost, force)
+                os.pwrite(fd, _STATE.pack(tokens, time.time()), 0)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            return wait
+
+    def _take(self, tokens: float, last: float, cost: float, force: bool):
+        tokens = min(self.burst, tokens + max(0.0, time.time() - last) * self.rate)
+        if force:
+            return min(tokens, 0.0) - cost, 0.0
+        if tokens >= cost:
+            return tokens - cost, 0.0
+        return tokens, (cost - tokens) / self.rate
+
+    async def acquire(self, deadline: float):
+        """Wait for a token until deadline (time.monotonic()); raises RateLimited."""
+        if self.rate <= 0:
+            return
+        while True:
+            wait = self._update(1.0)
+            if wait <= 0:
+                return
+            if time.monotonic() + wait > deadline:
+                raise RateLimited(f"{self.name} rate limit: no token within deadline")
+            await asyncio.sleep(wait)
+
+    def penalize(self, seconds: float = RATE_LIMIT_BACKOFF):
+        """Upstream throttled us: empty the bucket so all workers back off for about `seconds`."""
+        if self.rate > 0:
+            logger.warning("Upstream rate limited us, backing off", extra={"bucket": self.name, "seconds": seconds})
+            self._update(seconds * self.rate, force=True)
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Upstream throttling: DDGS RatelimitException, openai RateLimitError and the like."""
+    return not isinstance(error, RateLimited) and "ratelimit" in type(error).__name__.lower()
+
+
+search_limiter = SharedTokenBucket("search", SEARCH_RATE_LIMIT, SEARCH_RATE_BURST)
+llm_limiter = SharedTokenBucket("llm", LLM_RATE_LIMIT, LLM_RATE_BURST)
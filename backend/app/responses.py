@@ -0,0 +1,57 @@
+"""
+Pre-serialized JSON responses with strong ETags and conditional GET support.
+Hot endpoints build their bytes once and answer repeat requests without re-encoding.
+"""
+import hashlib
+import json
+from typing import Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+
+def make_etag(body: bytes, key: str = "") -> str:
+    """Strong ETag for a body, optionally scoped to a cache key."""
+    digest = hashlib.blake2b(key.encode(), digest_size=16)
+    digest.update(b"\0")
+    digest.update(body)
+    return f'"{digest.hexdigest()}"'
+
+
+class JSONPayload:
+    """JSON body bytes plus their ETag."""
+
+    __slots__ = ("body", "etag")
+
+    def __init__(self, body: bytes, key: str = ""):
+        self.body = body
+        self.etag = make_etag(body, key)
+
+    @classmethod
+    def from_obj(cls, obj, key: str = "") -> "JSONPayload":
+        return cls(json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode(), key)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against our ETag (RFC 9110 13.1.2)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def json_response(request: Request, payload: JSONPayload, cache_control: Optional[str] = None) -> Response:
+    """Send pre-serialized JSON, or a bodiless 304 if a GET already has this version."""
+    headers = {"ETag": payload.etag}
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+    if request.method in ("GET", "HEAD") and etag_matches(request.headers.get("if-none-match"), payload.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(payload.body, media_type="application/json", headers=headers)
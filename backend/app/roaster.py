@@ -1,115 +1,526 @@
+import importlib
 import json
+import logging
+import os
 import re
-from typing import List, Tuple
-from openai import OpenAI
-from ddgs import DDGS
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
 import asyncio
 from .models import StartupAnalysis
-from .cache import search_cache, response_cache
+from .metrics import timed
+from .streaming import JSONFieldStreamer
+from .cache import normalize_key, search_cache, response_cache, search_flight, response_flight, search_index
+from .knowledge import CompetitorIndex
+from .search_hits import SearchHit, build_search_context, compact_hits
+from .stats import roast_stats
+from .store import db_writer
+from .llm_router import ModelBackend, NoModelAvailable, llm_router
+from .ratelimit import LLM_RATE_LIMIT_WAIT, is_rate_limit_error, llm_limiter, search_limiter
+
+logger = logging.getLogger(__name__)
+
+
+# OpenAI-compatible endpoint (point at a local fake for benchmarks)
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+
+# LLM HTTP client settings (seconds / connection counts)
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "30"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "20"))
+
+# Competitor search deadlines (seconds): per DDGS query, and for the whole search
+SEARCH_QUERY_TIMEOUT = float(os.getenv("SEARCH_QUERY_TIMEOUT", "5"))
+SEARCH_DEADLINE = float(os.getenv("SEARCH_DEADLINE", "6"))
+# Threads for blocking search calls (per worker), kept apart from asyncio's default pool
+SEARCH_THREADS = int(os.getenv("SEARCH_THREADS", "8"))
+
+# Background refreshes of stale roasts running at once (per worker)
+REFRESH_CONCURRENCY = int(os.getenv("REFRESH_CONCURRENCY", "4"))
+
+# Optional "module:function" replacing DDGS, e.g. a stub for offline benchmarks
+SEARCH_PROVIDER = os.getenv("SEARCH_PROVIDER", "")
+
+SearchProvider = Callable[[str, int], List[dict]]
+
+
+def ddgs_search(query: str, max_results: int) -> List[dict]:
+    """Run a single blocking DDGS text query."""
+    from ddgs import DDGS
+    
+    with DDGS(timeout=max(1, int(SEARCH_QUERY_TIMEOUT))) as ddgs:
+        # DDGS may return an iterator, convert to list
+        return list(ddgs.text(query, max_results=max_results))
+
+
+def preload_sdks():
+    """Import the LLM and search SDKs. They're slow to import, so startup runs this in a thread."""
+    import httpx
+    import openai
+    if not SEARCH_PROVIDER:
+        import ddgs
+
+
+def load_search_provider() -> SearchProvider:
+    """DDGS by default, or the function named by SEARCH_PROVIDER."""
+    if not SEARCH_PROVIDER:
+        return ddgs_search
+    module_name, _, attr = SEARCH_PROVIDER.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+SYSTEM_PROMPT = """You are a brutally honest startup analyst who combines sharp wit with genuine market expertise. 
+You've analyzed thousands of startups, survived the dot-com bubble, watched WeWork implode, and have zero patience for derivative ideas.
+
+Your analysis must be:
+1. Brutally honest - No sugarcoating, tell them the truth
+2. Genuinely funny - Use clever wit, not just insults
+3. Data-driven - Reference real competitors and market dynamics
+4. Actually helpful - Give actionable insights behind the humor
+
+You must respond with valid JSON matching this exact structure:
+{
+    "verdict": "trash" | "potential" | "gold",
+    "roast": "Your brutally honest and clever assessment (2-4 sentences, be creative and unique)",
+    "competitors": ["Real", "competitors", "from", "search", "results"],
+    "score": 0.0 to 10.0,
+    "name_rating": "Concise rating of the startup name",
+    "advice": "Genuine strategic advice for improvement",
+    "market_size": "Assessment like 'Saturated - $X market with Y players' or 'Emerging - $X potential'",
+    "originality_score": 0.0 to 10.0,
+    "execution_difficulty": "Low/Medium/High - Brief explanation"
+}
+"""
+
+# Fields streamed to SSE clients as the model writes them
+STREAMED_FIELDS = ("roast", "advice")
 
 
 class StartupRoaster:
     """The Startup Roaster - crushing dreams since 2024."""
     
-    def __init__(self, openrouter_api_key: str):
+    def __init__(
+        self,
+        openrouter_api_key: str,
+        search_provider: Optional[SearchProvider] = None,
+        competitor_index: Optional[CompetitorIndex] = None,
+    ):
+        # Heavy SDKs are imported here, not at module level, to keep cold starts fast
+        import httpx
+        from openai import AsyncOpenAI
+        
+        self._search_provider = search_provider or load_search_provider()
+        # Local competitor knowledge (None when the shared database is off)
+        self._competitor_index = competitor_index
+        # Stale-while-revalidate refreshes in progress, by normalized key
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._refresh_slots = asyncio.Semaphore(REFRESH_CONCURRENCY)
+        # Dedicated pool so slow DDGS calls can't starve other to_thread work
+        self._search_pool = ThreadPoolExecutor(max_workers=SEARCH_THREADS, thread_name_prefix="search")
+        self.search_jobs = 0  # running in a search thread (including ones nobody awaits any more)
+        self._search_jobs_lock = threading.Lock()
+        # LLM calls left to finish (and be cached) after their caller gave up
+        self._detached: Set[asyncio.Task] = set()
+        # One pooled keep-alive client shared by every request on this worker
+        self._http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                LLM_READ_TIMEOUT,
+                connect=LLM_CONNECT_TIMEOUT,
+                read=LLM_READ_TIMEOUT,
+            ),
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_KEEPALIVE,
+            ),
+        )
         # Using OpenRouter for cheaper model access
-        self.client = OpenAI(
+        self.client = AsyncOpenAI(
             api_key=openrouter_api_key,
-            base_url="https://openrouter.ai/api/v1"
+            base_url=OPENROUTER_BASE_URL,
+            http_client=self._http_client,
         )
     
-    def _sync_search(self, name: str, description: str) -> Tuple[List[str], str]:
-        """Synchronous implementation of competitor search."""
+    async def close(self):
+        """Stop background work, the search pool and the pooled HTTP connections."""
+        for task in [*self._refreshing.values(), *self._detached]:
+            task.cancel()
+        self._search_pool.shutdown(wait=False, cancel_futures=True)
+        await self.client.close()
+    
+    def _sync_search(self, query: str, max_results: int, label: str = "search", idea: str = "") -> List[dict]:
+        """Run a single blocking search query and add its results to the local competitor index."""
+        with self._search_jobs_lock:
+            self.search_jobs += 1
         try:
-            with DDGS() as ddgs:
-                # Search for similar startups/apps
-                search_query = f"{description} app startup competitors"
-                # DDGS returns iterator, convert to list
-                results = list(ddgs.text(search_query, max_results=10))
-                
-                # Also search for the specific concept
-                concept_query = f"{name} similar apps alternatives"
-                concept_results = list(ddgs.text(concept_query, max_results=5))
-                
-                all_results = results + concept_results
-                
-                # Format search results for context
-                search_context = "\n".join([
-                    f"- {r.get('title', 'N/A')}: {r.get('body', 'N/A')[:200]}"
-                    for r in all_results
-                ])
-                
-                return all_results, search_context
-        except Exception as e:
-            print(f"Sync Search error: {e}")
-            return [], f"Search failed: {str(e)}"
+            with timed(f"search_{label}"):
+                results = self._search_provider(query, max_results)
+        finally:
+            with self._search_jobs_lock:
+                self.search_jobs -= 1
+        if self._competitor_index is not None and idea:
+            db_writer.submit(self._competitor_index.add_hits, compact_hits(results), idea)
+        return results
+    
+    async def _limited_search(self, query: str, max_results: int, label: str, idea: str, deadline: float) -> List[dict]:
+        """One search on the search pool, once the host-wide search rate limit allows it.
+        
+        Cancelling drops the job if it hasn't started; a query already running
+        finishes in its thread and still feeds the competitor index.
+        """
+        await search_limiter.acquire(deadline)
+        job = asyncio.get_running_loop().run_in_executor(
+            self._search_pool, self._sync_search, query, max_results, label, idea
+        )
+        return await asyncio.wait_for(job, SEARCH_QUERY_TIMEOUT)
+    
+    @property
+    def detached_calls(self) -> int:
+        """LLM calls still running for callers that went away."""
+        return len(self._detached)
+    
+    async def _run_searches(self, name: str, description: str) -> Tuple[List[SearchHit], str, bool]:
+        """Run both DDGS queries in parallel and merge whatever finishes by the deadline.
+        
+        Returns (hits, note, partial); note explains missing data for the prompt.
+        """
+        queries = {
+            # Search for similar startups/apps
+            "competitor": (f"{description} app startup competitors", 10),
+            # Also search for the specific concept
+            "concept": (f"{name} similar apps alternatives", 5),
+        }
+        deadline = time.monotonic() + SEARCH_DEADLINE
+        tasks = {
+            label: asyncio.create_task(self._limited_search(query, max_results, label, description, deadline))
+            for label, (query, max_results) in queries.items()
+        }
+        try:
+            done, _ = await asyncio.wait(tasks.values(), timeout=SEARCH_DEADLINE)
+        finally:
+            # Late or abandoned (caller cancelled) queries give up their place in the search pool
+            for task in tasks.values():
+                task.cancel()
+        
+        all_results: List[dict] = []
+        failed: List[str] = []
+        for label, task in tasks.items():
+            if task in done and task.exception() is None:
+                all_results.extend(task.result())
+            else:
+                error = task.exception() if task in done else "deadline exceeded"
+                if isinstance(error, BaseException) and is_rate_limit_error(error):
+                    search_limiter.penalize()
+                logger.warning("Search error (%s query): %r", label, error)
+                failed.append(label)
+        
+        # Both queries often surface the same pages
+        hits = compact_hits(all_results)
+        
+        if failed and not hits:
+            return [], "Search failed - no competitor data available", True
+        
+        note = ""
+        if failed:
+            note = (
+                f"(Note: search was partial - the {' and '.join(failed)} query failed or timed out, "
+                "so some competitors may be missing.)"
+            )
+        return hits, note, bool(failed)
 
-    async def search_competitors(self, name: str, description: str) -> Tuple[List[str], str]:
-        """Search the web for existing competitors using sync DDGS in a thread with caching."""
+    async def search_competitors(self, name: str, description: str) -> Tuple[List[SearchHit], str]:
+        """Search the web for existing competitors using sync DDGS in a thread with caching.
+        
+        Returns (hits, note); note is empty unless the search failed or was partial.
+        """
         # Create cache key from description (name can vary for same idea)
         cache_key = f"{name}:{description}"
         
         # Check cache first
-        cached = search_cache.get(cache_key)
+        cached = await search_cache.aget(cache_key)
         if cached is not None:
-            return cached
+            return cached, ""
+        
+        # A reworded version of a recently searched idea can reuse its results
+        match = search_index.find(description)
+        if match is not None:
+            similar_key, similarity = match
+            cached = await search_cache.aget(similar_key)
+            if cached is not None:
+                # Not cached under this key: a borrowed result must not outlive its source
+                logger.info("Reusing search for similar idea", extra={"similarity": round(similarity, 2)})
+                return cached, ""
+            search_index.discard(similar_key)
+        
+        # Past searches and roasts may already cover this kind of idea
+        local = await self._local_competitors(name, description)
+        if local is not None:
+            search_cache.set(cache_key, local)
+            return local, ""
         
+        # Concurrent misses for the same idea share a single search
+        return await search_flight.do(
+            cache_key, lambda: self._search_uncached(cache_key, name, description)
+        )
+    
+    async def _local_competitors(self, name: str, description: str) -> Optional[List[SearchHit]]:
+        """Confident matches from the local competitor index, if any (queried in a thread)."""
+        if self._competitor_index is None:
+            return None
         try:
-            result = await asyncio.to_thread(self._sync_search, name, description)
-            # Cache successful results
-            if result and result[0]:  # Has actual results
-                search_cache.set(cache_key, result)
-            return result
+            with timed("knowledge_lookup"):
+                hits = await asyncio.to_thread(self._competitor_index.lookup, name, description)
+        except sqlite3.Error as e:
+            logger.warning("Competitor index read error: %s", e)
+            return None
+        if hits is not None:
+            logger.info("Answered search from the local competitor index", extra={"hits": len(hits)})
+        return hits
+    
+    def _index_competitors(self, analysis: StartupAnalysis, description: str):
+        """Remember the competitors a roast named for this idea (written in the background)."""
+        if self._competitor_index is not None:
+            db_writer.submit(self._competitor_index.add_competitors, analysis.competitors, description)
+    
+    async def _search_uncached(self, cache_key: str, name: str, description: str) -> Tuple[List[SearchHit], str]:
+        """Run the threaded search and cache successful results."""
+        try:
+            hits, note, partial = await self._run_searches(name, description)
+            # Cache complete, successful results only so a slow moment isn't pinned for an hour
+            if hits and not partial:
+                search_cache.set(cache_key, hits)
+                search_index.add(description, cache_key)
+            return hits, note
         except Exception as e:
-            print(f"Thread execution error: {e}")
+            logger.exception("Search execution error: %s", e)
             # Graceful fallback - return empty results so AI can still work
             return [], "Search unavailable - analyzing without competitor data"
     
-    async def analyze_startup(self, name: str, description: str) -> StartupAnalysis:
-        """Analyze and roast a startup idea with response caching."""
+    async def analyze_startup(
+        self,
+        name: str,
+        description: str,
+        search_slots: Optional[asyncio.Semaphore] = None,
+        llm_slots: Optional[asyncio.Semaphore] = None,
+        check_cache: bool = True,
+    ) -> StartupAnalysis:
+        """Analyze and roast a startup idea with response caching.
+        
+        search_slots / llm_slots optionally bound how many searches and LLM
+        calls run at once across a group of analyses (e.g. a batch).
+        check_cache=False skips the lookup for callers that just missed it.
+        """
         # Check response cache first
         cache_key = f"{name}:{description}"
-        cached_response = response_cache.get(cache_key)
-        if cached_response is not None:
-            print("[Roaster] Returning cached AI response")
-            return cached_response
+        if check_cache:
+            cached_response = await self.cached_analysis(name, description)
+            if cached_response is not None:
+                logger.debug("Returning cached AI response")
+                return cached_response
+        
+        # Concurrent misses for the same idea share a single search + LLM call
+        return await response_flight.do(
+            cache_key,
+            lambda: self._analyze_uncached(cache_key, name, description, search_slots, llm_slots)
+        )
+    
+    async def cached_analysis(self, name: str, description: str) -> Optional[StartupAnalysis]:
+        """Cached roast for this idea, if any - no search or LLM call.
+        
+        A stale (past soft TTL) roast is still returned, and a background
+        refresh is scheduled so the next caller gets a fresh one.
+        """
+        found = await response_cache.aget_stale(f"{name}:{description}")
+        if found is None:
+            return None
+        analysis, stale = found
+        if stale:
+            self._schedule_refresh(name, description)
+        return analysis
+    
+    def _schedule_refresh(self, name: str, description: str):
+        """Start a background refresh for this idea unless one is already running."""
+        refresh_key = normalize_key(f"{name}:{description}")
+        if refresh_key in self._refreshing:
+            return
+        task = asyncio.create_task(self.refresh(name, description))
+        self._refreshing[refresh_key] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(refresh_key, None))
+    
+    async def refresh(self, name: str, description: str) -> Optional[StartupAnalysis]:
+        """Regenerate and re-cache a roast, bypassing the response cache.
         
+        Not counted in /stats: nobody asked for this roast.
+        """
+        cache_key = f"{name}:{description}"
+        try:
+            async with self._refresh_slots:
+                return await response_flight.do(
+                    cache_key, lambda: self._analyze_uncached(cache_key, name, description, record=False)
+                )
+        except Exception as e:
+            logger.warning("Background refresh failed: %s", e)
+            return None
+    
+    async def _analyze_uncached(
+        self,
+        cache_key: str,
+        name: str,
+        description: str,
+        search_slots: Optional[asyncio.Semaphore] = None,
+        llm_slots: Optional[asyncio.Semaphore] = None,
+        record: bool = True,
+    ) -> StartupAnalysis:
+        """Search, prompt the LLM and cache the validated analysis (counted in /stats if record)."""
         # First, search for competitors (Threaded Sync)
+        async with search_slots or nullcontext():
+            hits, search_note = await self._gather_search(name, description)
+        
+        try:
+            with timed("prompt_build"):
+                kwargs = self._completion_kwargs(name, description, hits, search_note)
+            
+            async with llm_slots or nullcontext():
+                # One host-wide token per roast; hedges ride on it (they're capped separately)
+                await llm_limiter.acquire(time.monotonic() + LLM_RATE_LIMIT_WAIT)
+                # Once the call is sent it runs to the end and gets cached, even if nobody waits
+                task = self._detach(self._complete_and_cache(cache_key, description, kwargs, record))
+                return await asyncio.shield(task)
+            
+        except Exception as e:
+            logger.error("OpenAI error: %s", e)
+            return self._fallback_analysis()
+    
+    async def _complete_and_cache(
+        self, cache_key: str, description: str, kwargs: dict, record: bool = True
+    ) -> StartupAnalysis:
+        """Routed LLM call; caches (and, if record, counts) the validated analysis."""
+        async def attempt(model: str) -> StartupAnalysis:
+            with timed("llm_call"):
+                response = await self._create_completion(model=model, **kwargs)
+            return self._parse_analysis(response.choices[0].message.content)
+        
+        # Best model first; a second request is hedged in if it runs past its p95
+        analysis = await llm_router.call(attempt)
+        
+        # Cache the successful response
+        response_cache.set(cache_key, analysis)
+        if record:
+            roast_stats.record(analysis)
+        self._index_competitors(analysis, description)
+        return analysis
+    
+    def _detach(self, coro) -> asyncio.Task:
+        """Run coro as a task that outlives its caller (close() still cancels it)."""
+        task = asyncio.ensure_future(coro)
+        self._detached.add(task)
+        task.add_done_callback(self._detached_done)
+        return task
+    
+    def _detached_done(self, task: asyncio.Task):
+        self._detached.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            # Already logged by the caller unless it had gone; retrieve it either way
+            logger.debug("Detached LLM call failed: %s", task.exception())
+    
+    async def stream_analysis(
+        self, name: str, description: str, check_cache: bool = True
+    ) -> AsyncIterator[Tuple[str, dict]]:
+        """Analyze a startup idea progressively, yielding (event, data) pairs.
+        
+        Events: "competitors" once search returns, "delta" for each chunk of
+        the roast/advice text as the LLM writes it, then a final "result".
+        check_cache=False skips the lookup for callers that just missed it.
+        """
+        cache_key = f"{name}:{description}"
+        if check_cache:
+            cached_response = await self.cached_analysis(name, description)
+            if cached_response is not None:
+                yield "result", cached_response.model_dump()
+                return
+        
+        hits, search_note = await self._gather_search(name, description)
+        yield "competitors", {
+            "results": [{"title": hit.title, "url": hit.url} for hit in hits]
+        }
+        
+        try:
+            with timed("prompt_build"):
+                kwargs = self._completion_kwargs(name, description, hits, search_note)
+            # Deltas are already on their way to the client, so streams are routed but not hedged
+            candidates = llm_router.ranked()
+            if not candidates:
+                raise NoModelAvailable("all LLM circuits are open")
+            await llm_limiter.acquire(time.monotonic() + LLM_RATE_LIMIT_WAIT)
+            # Once the stream is opened it is read to the end and cached, even if the client leaves
+            deltas: asyncio.Queue = asyncio.Queue()
+            task = self._detach(self._stream_and_cache(cache_key, description, kwargs, candidates[0], deltas))
+            while (item := await deltas.get()) is not None:
+                field, delta = item
+                yield "delta", {"field": field, "text": delta}
+            analysis = await asyncio.shield(task)
+        except Exception as e:
+            logger.error("OpenAI stream error: %s", e)
+            analysis = self._fallback_analysis()
+        
+        yield "result", analysis.model_dump()
+    
+    async def _stream_and_cache(
+        self, cache_key: str, description: str, kwargs: dict, backend: ModelBackend, deltas: asyncio.Queue
+    ) -> StartupAnalysis:
+        """Streamed LLM call; puts (field, text) deltas on the queue, then None, and caches the analysis."""
+        parser = JSONFieldStreamer(STREAMED_FIELDS)
+        content = []
+        try:
+            async with llm_router.using(backend) as model:
+                with timed("llm_stream"):
+                    stream = await self._create_completion(model=model, **kwargs, stream=True)
+                    async for chunk in stream:
+                        if not chunk.choices or not chunk.choices[0].delta.content:
+                            continue
+                        text = chunk.choices[0].delta.content
+                        content.append(text)
+                        for delta in parser.feed(text):
+                            deltas.put_nowait(delta)
+                analysis = self._parse_analysis("".join(content))
+        finally:
+            deltas.put_nowait(None)
+        
+        response_cache.set(cache_key, analysis)
+        roast_stats.record(analysis)
+        self._index_competitors(analysis, description)
+        return analysis
+    
+    async def _create_completion(self, **kwargs):
+        """Chat completion call; a 429 makes every worker back off."""
+        try:
+            return await self.client.chat.completions.create(**kwargs)
+        except Exception as e:
+            if is_rate_limit_error(e):
+                llm_limiter.penalize()
+            raise
+    
+    async def _gather_search(self, name: str, description: str) -> Tuple[List[SearchHit], str]:
+        """Competitor search that never raises; failures become an explanatory note."""
         try:
             search_response = await self.search_competitors(name, description)
             if search_response:
-                search_results, search_context = search_response
-            else:
-                print("Warning: search_competitors returned None")
-                search_results, search_context = [], "Search failed silently"
+                return search_response
+            logger.warning("search_competitors returned None")
+            return [], "Search failed silently"
         except Exception as e:
-            print(f"Search unpacking error: {e}")
-            search_results, search_context = [], "Search error"
-        
-        # Build the prompt
-        system_prompt = """You are a brutally honest startup analyst who combines sharp wit with genuine market expertise. 
-You've analyzed thousands of startups, survived the dot-com bubble, watched WeWork implode, and have zero patience for derivative ideas.
-
-Your analysis must be:
-1. Brutally honest - No sugarcoating, tell them the truth
-2. Genuinely funny - Use clever wit, not just insults
-3. Data-driven - Reference real competitors and market dynamics
-4. Actually helpful - Give actionable insights behind the humor
-
-You must respond with valid JSON matching this exact structure:
-{
-    "verdict": "trash" | "potential" | "gold",
-    "roast": "Your brutally honest and clever assessment (2-4 sentences, be creative and unique)",
-    "competitors": ["Real", "competitors", "from", "search", "results"],
-    "score": 0.0 to 10.0,
-    "name_rating": "Concise rating of the startup name",
-    "advice": "Genuine strategic advice for improvement",
-    "market_size": "Assessment like 'Saturated - $X market with Y players' or 'Emerging - $X potential'",
-    "originality_score": 0.0 to 10.0,
-    "execution_difficulty": "Low/Medium/High - Brief explanation"
-}
-"""
-
+            logger.exception("Search unpacking error: %s", e)
+            return [], "Search error"
+    
+    def _completion_kwargs(self, name: str, description: str, hits: List[SearchHit], search_note: str = "") -> dict:
+        """Chat completion arguments (all but the model) for roasting one idea."""
+        # Most relevant results first, within the prompt's token budget
+        search_context = "\n".join(
+            part for part in (build_search_context(hits, f"{name} {description}"), search_note) if part
+        )
         user_prompt = f"""Analyze this startup idea:
 
 **Startup Name:** {name}
@@ -122,25 +533,25 @@ Based on the search results and your startup wisdom, deliver your verdict.
 Extract actual competitor names from the search results if found.
 Remember: Be brutally honest, genuinely funny, and secretly helpful."""
 
-        try:
-            # We wrap the synchronous OpenAI call in a way that doesn't matter much for this demo 
-            # (blocking loop for 1-2s is acceptable here)
-            response = self.client.chat.completions.create(
-                model="openai/gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=1.2,
-                top_p=0.95,
-                max_tokens=1000,
-                response_format={"type": "json_object"}
-            )
-            
-            result = json.loads(response.choices[0].message.content)
-            
-            # Validate and return with all metrics
-            analysis = StartupAnalysis(
+        return dict(
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": user_prompt}
+            ],
+            temperature=1.2,
+            top_p=0.95,
+            max_tokens=1000,
+            response_format={"type": "json_object"}
+        )
+    
+    def _parse_analysis(self, content: str) -> StartupAnalysis:
+        """Decode the model's JSON answer and validate it into a StartupAnalysis."""
+        with timed("json_decode"):
+            result = json.loads(content)
+        
+        # Validate and return with all metrics
+        with timed("validation"):
+            return StartupAnalysis(
                 verdict=result.get("verdict", "trash"),
                 roast=result.get("roast", "Our AI is speechless. That's either really good or really bad."),
                 competitors=result.get("competitors", [])[:10],
@@ -151,24 +562,20 @@ Remember: Be brutally honest, genuinely funny, and secretly helpful."""
                 originality_score=min(10, max(0, float(result.get("originality_score", 5)))) if result.get("originality_score") else None,
                 execution_difficulty=result.get("execution_difficulty")
             )
-            
-            # Cache the successful response
-            response_cache.set(cache_key, analysis)
-            return analysis
-            
-        except Exception as e:
-            print(f"OpenAI error: {e}")
-            return StartupAnalysis(
-                verdict="potential",
-                roast="Our AI is having an existential crisis trying to process your idea. That's... something?",
-                competitors=[],
-                score=5.0,
-                name_rating="Error - Even AI couldn't handle this",
-                advice="Try again when our servers recover from your pitch",
-                market_size="Unknown - Analysis failed",
-                originality_score=5.0,
-                execution_difficulty="Unknown"
-            )
+    
+    def _fallback_analysis(self) -> StartupAnalysis:
+        """Generic answer used when the LLM call fails."""
+        return StartupAnalysis(
+            verdict="potential",
+            roast="Our AI is having an existential crisis trying to process your idea. That's... something?",
+            competitors=[],
+            score=5.0,
+            name_rating="Error - Even AI couldn't handle this",
+            advice="Try again when our servers recover from your pitch",
+            market_size="Unknown - Analysis failed",
+            originality_score=5.0,
+            execution_difficulty="Unknown"
+        )
 
 
 # Pre-built example roasts for demo/fallback
@@ -0,0 +1,96 @@
+"""
+Compact competitor-search results and the prompt context built from them.
+Raw DDGS dicts are reduced to small slotted records, de-duplicated, and
+packed into a token budget most-relevant first.
+"""
+import os
+from typing import Iterable, List
+from urllib.parse import urlsplit
+
+from .similarity import tokenize
+
+# Longest snippet kept per hit (characters)
+SEARCH_SNIPPET_CHARS = int(os.getenv("SEARCH_SNIPPET_CHARS", "200"))
+# Hits kept per site, so one domain can't fill the prompt
+SEARCH_MAX_HITS_PER_DOMAIN = int(os.getenv("SEARCH_MAX_HITS_PER_DOMAIN", "1"))
+# Approximate LLM tokens allowed for search results in the prompt
+PROMPT_SEARCH_TOKEN_BUDGET = int(os.getenv("PROMPT_SEARCH_TOKEN_BUDGET", "400"))
+
+# Rough characters per token for English text
+_CHARS_PER_TOKEN = 4
+
+
+class SearchHit:
+    """One search result: title, URL, domain and a trimmed snippet."""
+
+    __slots__ = ("title", "url", "domain", "snippet")
+
+    def __init__(self, title: str, url: str, domain: str, snippet: str):
+        self.title = title
+        self.url = url
+        self.domain = domain
+        self.snippet = snippet
+
+    @classmethod
+    def from_raw(cls, raw: dict) -> "SearchHit":
+        """Build from a DDGS-style {"title", "href", "body"} dict."""
+        url = raw.get("href") or raw.get("url") or ""
+        domain = urlsplit(url).hostname or ""
+        if domain.startswith("www."):
+            domain = domain[4:]
+        return cls(raw.get("title") or "N/A", url, domain, _trim(raw.get("body") or ""))
+
+    def to_list(self) -> list:
+        return [self.title, self.url, self.domain, self.snippet]
+
+    @classmethod
+    def from_list(cls, values: list) -> "SearchHit":
+        return cls(*values)
+
+
+def _trim(text: str) -> str:
+    """Collapse whitespace and cut at a word boundary."""
+    text = " ".join(text.split())
+    if len(text) <= SEARCH_SNIPPET_CHARS:
+        return text
+    cut = text.rfind(" ", 0, SEARCH_SNIPPET_CHARS)
+    return text[:cut if cut > 0 else SEARCH_SNIPPET_CHARS] + "…"
+
+
+def compact_hits(results: Iterable[dict]) -> List[SearchHit]:
+    """Raw results -> SearchHits, de-duplicated by URL and capped per domain."""
+    seen_urls = set()
+    per_domain = {}
+    hits = []
+    for raw in results:
+        hit = SearchHit.from_raw(raw)
+        url = hit.url or hit.title
+        if url in seen_urls:
+            continue
+        seen_urls.add(url)
+        if hit.domain:
+            if per_domain.get(hit.domain, 0) >= SEARCH_MAX_HITS_PER_DOMAIN:
+                continue
+            per_domain[hit.domain] = per_domain.get(hit.domain, 0) + 1
+        hits.append(hit)
+    return hits
+
+
+def build_search_context(hits: List[SearchHit], query: str, token_budget: int = PROMPT_SEARCH_TOKEN_BUDGET) -> str:
+    """Prompt lines for the hits most relevant to query that fit in token_budget."""
+    query_words = tokenize(query)
+
+    def relevance(item):
+        rank, hit = item
+        # Shared content words first, then the search engine's own order
+        return (-len(query_words & tokenize(f"{hit.title} {hit.snippet}")), rank)
+
+    budget = token_budget * _CHARS_PER_TOKEN
+    lines = []
+    for _, hit in sorted(enumerate(hits), key=relevance):
+        line = f"- {hit.title}: {hit.snippet}"
+        if len(line) + 1 > budget:
+            continue
+        budget -= len(line) + 1
+        lines.append(line)
+    return "\n".join(lines)
@@ -0,0 +1,138 @@
+"""
+Near-duplicate lookup for startup descriptions.
+MinHash signatures + LSH banding find candidates, exact word Jaccard confirms them.
+"""
+import hashlib
+import random
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Filler words that say nothing about what the startup does
+STOPWORDS = frozenset("""
+a an and app apps application are as at be by can do for from get gets help helps
+in into is it its let lets of on or our platform service that the their them they
+this to tool using via we where which who will with you your
+""".split())
+
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+def _stem(word: str) -> str:
+    """Crude suffix stripping so 'walking', 'walked' and 'walks' match."""
+    for suffix in ("ing", "ed", "es", "s"):
+        if len(word) > len(suffix) + 2 and word.endswith(suffix):
+            return word[: -len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> FrozenSet[str]:
+    """Set of stemmed content words in a description."""
+    return frozenset(
+        _stem(w) for w in _WORD_RE.findall(text.lower()) if w not in STOPWORDS
+    )
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """Word-set Jaccard similarity."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class SimilarityIndex:
+    """Bounded index of recent descriptions that maps near-duplicates to a stored key.
+
+    Descriptions are only a handful of content words, so one changed word moves
+    Jaccard a lot: the threshold is high, and descriptions with fewer than
+    min_tokens words are neither indexed nor matched.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        max_entries: int = 5000,
+        bands: int = 16,
+        rows: int = 2,
+        min_tokens: int = 4,
+    ):
+        self._threshold = threshold
+        self._min_tokens = min_tokens
+        self._max_entries = max_entries
+        self._bands = bands
+        self._rows = rows
+        rng = random.Random(1337)  # fixed seed so signatures are stable
+        self._perms = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(bands * rows)
+        ]
+        # key -> (word set, band hashes), oldest first
+        self._entries: "OrderedDict[str, Tuple[FrozenSet[str], List[Tuple[int, ...]]]]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def _band_hashes(self, tokens: FrozenSet[str]) -> List[Tuple[int, ...]]:
+        """MinHash signature split into LSH bands."""
+        bases = [
+            int.from_bytes(hashlib.blake2b(t.encode(), digest_size=8).digest(), "big")
+            for t in tokens
+        ]
+        signature = [
+            min((a * x + b) % _MERSENNE_PRIME for x in bases) for a, b in self._perms
+        ]
+        r = self._rows
+        return [tuple(signature[i * r:(i + 1) * r]) for i in range(self._bands)]
+
+    def add(self, text: str, key: str):
+        """Index a description under the given key."""
+        tokens = tokenize(text)
+        if len(tokens) < self._min_tokens:
+            return
+        bands = self._band_hashes(tokens)
+        with self._lock:
+            if key in self._entries:
+                self._discard(key)
+            self._entries[key] = (tokens, bands)
+            for i, band in enumerate(bands):
+                self._buckets.setdefault((i, band), set()).add(key)
+            while len(self._entries) > self._max_entries:
+                self._discard(next(iter(self._entries)))
+
+    def _discard(self, key: str):
+        """Remove a key from entries and buckets. Caller holds the lock."""
+        _, bands = self._entries.pop(key)
+        for i, band in enumerate(bands):
+            bucket = self._buckets.get((i, band))
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[(i, band)]
+
+    def find(self, text: str) -> Optional[Tuple[str, float]]:
+        """Best (key, similarity) at or above the threshold, or None."""
+        tokens = tokenize(text)
+        if len(tokens) < self._min_tokens:
+            return None
+        bands = self._band_hashes(tokens)
+        best: Optional[Tuple[str, float]] = None
+        with self._lock:
+            candidates: Set[str] = set()
+            for i, band in enumerate(bands):
+                candidates |= self._buckets.get((i, band), set())
+            for key in candidates:
+                score = jaccard(tokens, self._entries[key][0])
+                if score >= self._threshold and (best is None or score > best[1]):
+                    best = (key, score)
+        return best
+
+    def discard(self, key: str):
+        """Forget a key (e.g. when its cached value is gone)."""
+        with self._lock:
+            if key in self._entries:
+                self._discard(key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
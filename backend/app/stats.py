@@ -0,0 +1,211 @@
+"""
+Running roast statistics for /stats.
+O(1) counters and a running mean per roast, plus a bounded Space-Saving sketch
+of the most-found competitors. Optionally merged across workers through SQLite.
+"""
+import asyncio
+import heapq
+import logging
+import os
+import sqlite3
+import threading
+from operator import itemgetter
+from typing import Dict, List, Optional, Tuple
+
+from .models import StartupAnalysis, StatsResponse
+from .store import default_store_path
+
+logger = logging.getLogger(__name__)
+
+VERDICTS = ("trash", "potential", "gold")
+
+# Competitor names tracked by the heavy-hitters sketch (per worker and shared)
+STATS_TOP_K_CAPACITY = int(os.getenv("STATS_TOP_K_CAPACITY", "200"))
+# Seconds between merges into the shared stats database; 0 keeps stats per worker
+STATS_SNAPSHOT_INTERVAL = float(os.getenv("STATS_SNAPSHOT_INTERVAL", "30"))
+# Competitors listed by /stats
+STATS_TOP_COMPETITORS = 10
+
+
+class SpaceSaving:
+    """Approximate top-k counter in bounded memory (Metwally et al., Space-Saving).
+
+    When full, a new item replaces the smallest counter and inherits its count,
+    so frequent items are never under-counted.
+    """
+
+    def __init__(self, capacity: int):
+        self._capacity = capacity
+        self._counts: Dict[str, int] = {}
+        # (count, item) min-heap; entries whose count is outdated are skipped lazily
+        self._heap: List[Tuple[int, str]] = []
+
+    def add(self, item: str, count: int = 1):
+        counts = self._counts
+        if item in counts:
+            counts[item] += count
+        elif len(counts) < self._capacity:
+            counts[item] = count
+        else:
+            while True:
+                smallest, victim = heapq.heappop(self._heap)
+                if counts.get(victim) == smallest:
+                    break
+            del counts[victim]
+            counts[item] = smallest + count
+        heapq.heappush(self._heap, (counts[item], item))
+        if len(self._heap) > 4 * self._capacity:
+            self._heap = [(c, i) for i, c in counts.items()]
+            heapq.heapify(self._heap)
+
+    def top(self, n: int) -> List[Tuple[str, int]]:
+        """The n largest (item, count) pairs."""
+        return heapq.nlargest(n, self._counts.items(), key=itemgetter(1))
+
+    def get(self, item: str) -> int:
+        return self._counts.get(item, 0)
+
+    def items(self) -> Dict[str, int]:
+        return dict(self._counts)
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+
+class _Aggregates:
+    """Counters for one span of roasts."""
+
+    def __init__(self, capacity: int):
+        self.total = 0
+        self.verdicts = dict.fromkeys(VERDICTS, 0)
+        self.score_sum = 0.0
+        self.competitors = SpaceSaving(capacity)
+        # competitors.top(STATS_TOP_COMPETITORS), precomputed for merged bases
+        self.top: List[Tuple[str, int]] = []
+
+
+class RoastStats:
+    """All-time roast stats: a merged base (from the shared store) plus local pending counts."""
+
+    def __init__(self, capacity: int = STATS_TOP_K_CAPACITY):
+        self._capacity = capacity
+        self._lock = threading.Lock()
+        self._pending = _Aggregates(capacity)
+        self._base = _Aggregates(capacity)
+
+    def record(self, analysis: StartupAnalysis):
+        """Count one generated roast."""
+        with self._lock:
+            pending = self._pending
+            pending.total += 1
+            pending.verdicts[analysis.verdict] += 1
+            pending.score_sum += analysis.score
+            for name in analysis.competitors:
+                name = " ".join(name.split())
+                if name:
+                    pending.competitors.add(name)
+
+    def summary(self) -> StatsResponse:
+        """Current totals, including roasts not yet merged into the shared store."""
+        with self._lock:
+            total = self._base.total + self._pending.total
+            score_sum = self._base.score_sum + self._pending.score_sum
+            verdicts = {v: self._base.verdicts[v] + self._pending.verdicts[v] for v in VERDICTS}
+            # Only names with pending counts can overtake the base's top list
+            competitors = dict(self._base.top)
+            base = self._base.competitors
+            for name, count in self._pending.competitors.items().items():
+                competitors[name] = base.get(name) + count
+        top = heapq.nlargest(STATS_TOP_COMPETITORS, competitors.items(), key=itemgetter(1))
+        return StatsResponse(
+            total_roasts=total,
+            trash_count=verdicts["trash"],
+            potential_count=verdicts["potential"],
+            gold_count=verdicts["gold"],
+            average_score=round(score_sum / total, 2) if total else 0.0,
+            top_competitors_found=[name for name, _ in top],
+        )
+
+    def merge_into(self, path: str):
+        """Add pending counts to the shared store and reload the merged totals (blocking)."""
+        with self._lock:
+            delta, self._pending = self._pending, _Aggregates(self._capacity)
+        try:
+            merged = _merge_snapshot(path, delta, self._capacity)
+        except sqlite3.Error as e:
+            logger.warning("Could not merge stats into %s: %s", path, e)
+            with self._lock:
+                self._restore(delta)
+            return
+        merged.top = merged.competitors.top(STATS_TOP_COMPETITORS)
+        with self._lock:
+            self._base = merged
+
+    def _restore(self, delta: _Aggregates):
+        """Put an unmerged delta back into pending. Caller holds the lock."""
+        pending = self._pending
+        pending.total += delta.total
+        pending.score_sum += delta.score_sum
+        for v in VERDICTS:
+            pending.verdicts[v] += delta.verdicts[v]
+        for name, count in delta.competitors.items().items():
+            pending.competitors.add(name, count)
+
+
+def _merge_snapshot(path: str, delta: _Aggregates, capacity: int) -> _Aggregates:
+    """Atomically add delta to the shared tables; return the merged totals."""
+    conn = sqlite3.connect(path, timeout=5, isolation_level=None)
+    try:
+        conn.execute("CREATE TABLE IF NOT EXISTS stats_totals (key TEXT PRIMARY KEY, value REAL NOT NULL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS stats_competitors (name TEXT PRIMARY KEY, count INTEGER NOT NULL)")
+        conn.execute("BEGIN IMMEDIATE")
+        totals = {"total": delta.total, "score_sum": delta.score_sum, **delta.verdicts}
+        conn.executemany(
+            "INSERT INTO stats_totals (key, value) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = value + excluded.value",
+            totals.items(),
+        )
+        conn.executemany(
+            "INSERT INTO stats_competitors (name, count) VALUES (?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET count = count + excluded.count",
+            delta.competitors.items().items(),
+        )
+        # Keep the shared sketch bounded too
+        conn.execute(
+            "DELETE FROM stats_competitors WHERE name NOT IN "
+            "(SELECT name FROM stats_competitors ORDER BY count DESC LIMIT ?)",
+            (capacity,),
+        )
+        merged = _Aggregates(capacity)
+        values = dict(conn.execute("SELECT key, value FROM stats_totals"))
+        merged.total = int(values.get("total", 0))
+        merged.score_sum = values.get("score_sum", 0.0)
+        for v in VERDICTS:
+            merged.verdicts[v] = int(values.get(v, 0))
+        for name, count in conn.execute("SELECT name, count FROM stats_competitors"):
+            merged.competitors.add(name, count)
+        conn.execute("COMMIT")
+        return merged
+    except sqlite3.Error:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def stats_db_path() -> Optional[str]:
+    """Shared stats database (the cache database), or None if snapshots are off."""
+    if STATS_SNAPSHOT_INTERVAL <= 0:
+        return None
+    return default_store_path()
+
+
+async def snapshot_stats(path: str):
+    """Merge this worker's stats into the shared store now and every STATS_SNAPSHOT_INTERVAL seconds."""
+    while True:
+        await asyncio.to_thread(roast_stats.merge_into, path)
+        await asyncio.sleep(STATS_SNAPSHOT_INTERVAL)
+
+
+roast_stats = RoastStats()
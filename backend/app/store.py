@@ -0,0 +1,156 @@
+"""
+Persistent, host-local cache tier backed by SQLite.
+Shared by every uvicorn worker on the host and survives restarts.
+"""
+import logging
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds a write waits on another worker's lock before giving up (reads never wait in WAL mode)
+CACHE_DB_BUSY_TIMEOUT = float(os.getenv("CACHE_DB_BUSY_TIMEOUT", "1"))
+# L2 writes queued for the writer thread before new ones are dropped
+CACHE_DB_WRITE_QUEUE = int(os.getenv("CACHE_DB_WRITE_QUEUE", "10000"))
+
+
+class SQLiteStore:
+    """Key/value store with expiry, one namespace per cache.
+
+    Uses WAL mode so readers in other workers never block on a writer.
+    Each thread gets its own connection (sqlite3 connections aren't shareable).
+    """
+
+    PURGE_EVERY = 256  # sets between sweeps of expired rows
+
+    def __init__(self, path: str, namespace: str):
+        self._path = path
+        self._namespace = namespace
+        self._local = threading.local()
+        self._sets = 0
+        conn = self._conn()
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS cache (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value BLOB NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            ) WITHOUT ROWID"""
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_expiry ON cache (expires_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        """Get (or open) this thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=CACHE_DB_BUSY_TIMEOUT, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[bytes, float]]:
+        """Return (value, expires_at) if present and not expired."""
+        row = self._conn().execute(
+            "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ? AND expires_at > ?",
+            (self._namespace, key, time.time()),
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def set(self, key: str, value: bytes, expires_at: float):
+        """Insert or replace an entry."""
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+            (self._namespace, key, value, expires_at),
+        )
+        self._sets += 1
+        if self._sets % self.PURGE_EVERY == 0:
+            conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+
+    def delete(self, key: str):
+        """Remove an entry."""
+        self._conn().execute(
+            "DELETE FROM cache WHERE namespace = ? AND key = ?", (self._namespace, key)
+        )
+
+    def clear(self):
+        """Remove every entry in this namespace."""
+        self._conn().execute("DELETE FROM cache WHERE namespace = ?", (self._namespace,))
+
+
+def default_store_path() -> Optional[str]:
+    """Path of the shared cache database, or None if disabled via CACHE_DB_PATH=''."""
+    path = os.getenv(
+        "CACHE_DB_PATH",
+        os.path.join(tempfile.gettempdir(), "is-my-startup-trash-cache.sqlite3"),
+    )
+    return path or None
+
+
+def open_store(namespace: str) -> Optional[SQLiteStore]:
+    """Open the shared store for a namespace; returns None if disabled or unavailable."""
+    path = default_store_path()
+    if not path:
+        return None
+    try:
+        return SQLiteStore(path, namespace)
+    except sqlite3.Error as e:
+        logger.warning("Disabled persistent cache (%s): %s", path, e)
+        return None
+
+
+class WriteBehind:
+    """One background thread applying shared-database writes in order.
+
+    Callers (usually on the event loop) only enqueue, so a sibling worker
+    holding the SQLite write lock never stalls a request.
+    """
+
+    def __init__(self, max_pending: int = CACHE_DB_WRITE_QUEUE):
+        self._queue: "queue.Queue[Tuple[Callable, tuple]]" = queue.Queue(max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.dropped = 0
+
+    def submit(self, fn: Callable, *args):
+        """Run fn(*args) on the writer thread; dropped (and counted) if the queue is full."""
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+                    self._thread.start()
+        try:
+            self._queue.put_nowait((fn, args))
+        except queue.Full:
+            self.dropped += 1
+            logger.warning("Dropped a shared cache write, writer is behind")
+
+    def _run(self):
+        while True:
+            fn, args = self._queue.get()
+            try:
+                fn(*args)
+            except Exception as e:
+                logger.warning("Shared cache write failed: %s", e)
+            finally:
+                self._queue.task_done()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait (blocking) for queued writes to finish; False on timeout."""
+        done = self._queue.all_tasks_done
+        with done:
+            return done.wait_for(lambda: not self._queue.unfinished_tasks, timeout)
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+
+# Every write to the shared database from this process goes through here
+db_writer = WriteBehind()
@@ -0,0 +1,92 @@
+"""
+Incremental JSON parsing for streamed LLM output.
+Pulls selected top-level string fields out of a JSON object as it arrives.
+"""
+from typing import Iterable, List, Optional, Tuple
+
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+
+class JSONFieldStreamer:
+    """Feed raw JSON text chunks; get back (field, text) deltas for the watched fields.
+
+    Only string values of the top-level object are emitted; nested values
+    and every other field are skipped. Keys and values can be split across
+    chunks at any character, including inside escape sequences.
+    """
+
+    def __init__(self, fields: Iterable[str]):
+        self._fields = set(fields)
+        self._depth = 0
+        self._expect_key = False
+        self._key: Optional[str] = None
+        self._in_string = False
+        self._string_is_key = False
+        self._key_buf: List[str] = []
+        self._escape = False
+        self._unicode: Optional[str] = None
+        self._high_surrogate: Optional[int] = None
+        self._out: List[Tuple[str, str]] = []
+
+    def feed(self, chunk: str) -> List[Tuple[str, str]]:
+        """Consume a chunk and return the new text for each watched field, in order."""
+        self._out = []
+        for ch in chunk:
+            if self._in_string:
+                self._string_char(ch)
+            elif ch == '"':
+                self._in_string = True
+                self._string_is_key = self._depth == 1 and self._expect_key
+                self._key_buf = []
+            elif ch in '{[':
+                self._depth += 1
+                if self._depth == 1:
+                    self._expect_key = ch == '{'
+            elif ch in '}]':
+                self._depth -= 1
+            elif self._depth == 1 and ch == ':':
+                self._expect_key = False
+            elif self._depth == 1 and ch == ',':
+                self._expect_key = True
+                self._key = None
+        return self._out
+
+    def _string_char(self, ch: str):
+        """Handle one character inside a string literal."""
+        if self._unicode is not None:
+            self._unicode += ch
+            if len(self._unicode) == 4:
+                code = int(self._unicode, 16)
+                self._unicode = None
+                if 0xD800 <= code <= 0xDBFF:
+                    self._high_surrogate = code
+                elif 0xDC00 <= code <= 0xDFFF and self._high_surrogate is not None:
+                    pair = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+                    self._high_surrogate = None
+                    self._emit(chr(pair))
+                else:
+                    self._emit(chr(code))
+        elif self._escape:
+            self._escape = False
+            if ch == 'u':
+                self._unicode = ''
+            else:
+                self._emit(_ESCAPES.get(ch, ch))
+        elif ch == '\\':
+            self._escape = True
+        elif ch == '"':
+            self._in_string = False
+            if self._string_is_key:
+                self._key = ''.join(self._key_buf)
+        else:
+            self._emit(ch)
+
+    def _emit(self, text: str):
+        """Route decoded string text to the key buffer or the output."""
+        if self._string_is_key:
+            self._key_buf.append(text)
+        elif self._depth == 1 and self._key in self._fields:
+            if self._out and self._out[-1][0] == self._key:
+                self._out[-1] = (self._key, self._out[-1][1] + text)
+            else:
+                self._out.append((self._key, text))
@@ -0,0 +1,169 @@
+"""
+Cache warming: remember which ideas get requested most, and pre-roast them
+(plus the built-in examples) when a new process starts.
+"""
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: every worker warms
+    fcntl = None
+
+from .cache import normalize_key, response_cache
+
+logger = logging.getLogger(__name__)
+
+WARM_ON_STARTUP = os.getenv("WARM_ON_STARTUP", "1") == "1"
+WARM_TOP_K = int(os.getenv("WARM_TOP_K", "50"))
+WARM_CONCURRENCY = int(os.getenv("WARM_CONCURRENCY", "2"))
+POPULAR_IDEAS_PATH = os.getenv(
+    "POPULAR_IDEAS_PATH",
+    os.path.join(tempfile.gettempdir(), "is-my-startup-trash-popular.json"),
+)
+# Held by the one worker per host that is warming the shared cache
+WARM_LOCK_PATH = os.getenv(
+    "WARM_LOCK_PATH",
+    os.path.join(tempfile.gettempdir(), "is-my-startup-trash-warm.lock"),
+)
+
+
+class PopularityTracker:
+    """Bounded request counter per idea, persisted between runs."""
+
+    def __init__(self, path: str, capacity: int = 1000):
+        self._path = path
+        self._capacity = capacity
+        # normalized key -> [name, description, count]
+        self._counts: Dict[str, list] = {}
+        self._lock = threading.Lock()
+        self._started = time.time()
+
+    def record(self, name: str, description: str):
+        """Count one request for an idea."""
+        key = normalize_key(f"{name}:{description}")
+        with self._lock:
+            entry = self._counts.get(key)
+            if entry is not None:
+                entry[2] += 1
+                return
+            self._counts[key] = [name, description, 1]
+            if len(self._counts) > 2 * self._capacity:
+                self._trim()
+
+    def _trim(self):
+        """Keep the `capacity` most requested ideas. Caller holds the lock."""
+        top = sorted(self._counts.items(), key=lambda item: item[1][2], reverse=True)
+        self._counts = dict(top[:self._capacity])
+
+    def load_previous(self) -> List[Tuple[str, str]]:
+        """Ideas saved by the previous run, most requested first."""
+        try:
+            with open(self._path) as f:
+                entries = json.load(f)
+            return [(e["name"], e["description"]) for e in entries]
+        except (OSError, ValueError, KeyError, TypeError):
+            return []
+
+    def save(self):
+        """Persist counts, merging with sibling workers of this run that saved first."""
+        with self._lock:
+            counts = {key: list(entry) for key, entry in self._counts.items()}
+        try:
+            if os.path.getmtime(self._path) >= self._started:
+                with open(self._path) as f:
+                    for e in json.load(f):
+                        key = normalize_key(f"{e['name']}:{e['description']}")
+                        if key in counts:
+                            counts[key][2] += e["count"]
+                        else:
+                            counts[key] = [e["name"], e["description"], e["count"]]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        ranked = sorted(counts.values(), key=lambda entry: entry[2], reverse=True)[:self._capacity]
+        tmp_path = f"{self._path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump([{"name": n, "description": d, "count": c} for n, d, c in ranked], f)
+            os.replace(tmp_path, self._path)
+        except OSError as e:
+            logger.warning("Could not save popular ideas: %s", e)
+
+
+popularity = PopularityTracker(POPULAR_IDEAS_PATH)
+
+
+def _claim_warming() -> Tuple[bool, Optional[int]]:
+    """(whether this worker should warm, lock descriptor to close when it's done)."""
+    if fcntl is None:
+        return True, None
+    try:
+        fd = os.open(WARM_LOCK_PATH, os.O_RDWR | os.O_CREAT, 0o600)
+    except OSError as e:
+        logger.warning("Could not open warm-up lock %s, warming anyway: %s", WARM_LOCK_PATH, e)
+        return True, None
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        # A sibling worker holds it
+        os.close(fd)
+        return False, None
+    return True, fd
+
+
+async def _is_fresh(name: str, description: str) -> bool:
+    found = await response_cache.aget_stale(f"{name}:{description}")
+    return found is not None and not found[1]
+
+
+async def warm_caches(roaster, ideas: List[Tuple[str, str]]):
+    """Roast every idea that isn't already fresh in the response cache.
+
+    Only one worker per host warms; the others find its roasts in the shared L2.
+    """
+    claimed, fd = _claim_warming()
+    if not claimed:
+        logger.info("Cache warm-up left to another worker")
+        return
+    try:
+        await _warm(roaster, ideas)
+    finally:
+        if fd is not None:
+            os.close(fd)
+
+
+async def _warm(roaster, ideas: List[Tuple[str, str]]):
+    slots = asyncio.Semaphore(WARM_CONCURRENCY)
+    warmed = 0
+
+    async def warm(name: str, description: str):
+        nonlocal warmed
+        if await _is_fresh(name, description):
+            return
+        async with slots:
+            # Another worker (or a request) may have roasted it while this one queued
+            if await _is_fresh(name, description):
+                return
+            if await roaster.refresh(name, description) is not None:
+                warmed += 1
+
+    # De-duplicate while keeping priority order
+    seen = set()
+    unique = []
+    for name, description in ideas:
+        key = normalize_key(f"{name}:{description}")
+        if key not in seen:
+            seen.add(key)
+            unique.append((name, description))
+    start = time.perf_counter()
+    await asyncio.gather(*(warm(name, description) for name, description in unique))
+    logger.info(
+        "Cache warm-up done",
+        extra={"ideas": len(unique), "warmed": warmed, "seconds": round(time.perf_counter() - start, 2)},
+    )
@@ -0,0 +1 @@
+# Offline load-test harness: fake upstreams + load driver
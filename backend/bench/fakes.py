@@ -0,0 +1,94 @@
+"""
+Local stand-ins for the upstreams, so benchmarks never touch DDGS or OpenRouter.
+
+- search(): drop-in SEARCH_PROVIDER for the app (blocking, like DDGS)
+- app: fake OpenAI-compatible chat-completions server (run with uvicorn)
+
+Latency (ms) and error rates come from FAKE_* environment variables.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+from typing import List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+SEARCH_LATENCY_MS = float(os.getenv("FAKE_SEARCH_LATENCY_MS", "800"))
+SEARCH_ERROR_RATE = float(os.getenv("FAKE_SEARCH_ERROR_RATE", "0"))
+LLM_LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", "2000"))
+LLM_ERROR_RATE = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))
+# Latency jitter as a fraction of the mean (uniform +/-)
+JITTER = float(os.getenv("FAKE_JITTER", "0.3"))
+
+
+def _latency(mean_ms: float) -> float:
+    return max(0.0, mean_ms * random.uniform(1 - JITTER, 1 + JITTER)) / 1000
+
+
+def search(query: str, max_results: int) -> List[dict]:
+    """Blocking fake DDGS text search with deterministic results per query."""
+    time.sleep(_latency(SEARCH_LATENCY_MS))
+    if random.random() < SEARCH_ERROR_RATE:
+        raise RuntimeError("fake search: rate limited")
+    seed = hashlib.md5(query.encode()).hexdigest()[:8]
+    return [
+        {
+            "title": f"Competitor {seed}-{i}",
+            "href": f"https://competitor-{seed}-{i}.example.com/",
+            "body": f"Competitor {seed}-{i} already does this. " * 8,
+        }
+        for i in range(max_results)
+    ]
+
+
+app = FastAPI(title="Fake OpenAI-compatible API")
+
+
+def _analysis(prompt: str) -> dict:
+    seed = int(hashlib.md5(prompt.encode()).hexdigest()[:4], 16)
+    return {
+        "verdict": ("trash", "potential", "gold")[seed % 3],
+        "roast": "This has been done before, and better. " * 3,
+        "competitors": [f"Competitor {seed}-{i}" for i in range(4)],
+        "score": seed % 11,
+        "name_rating": "Forgettable",
+        "advice": "Find a niche nobody has bothered to roast yet.",
+        "market_size": "Saturated - $1B market with 50 players",
+        "originality_score": (seed // 11) % 11,
+        "execution_difficulty": "Medium - Standard marketplace",
+    }
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    await asyncio.sleep(_latency(LLM_LATENCY_MS))
+    if random.random() < LLM_ERROR_RATE:
+        return JSONResponse({"error": {"message": "fake upstream overloaded"}}, status_code=503)
+
+    content = json.dumps(_analysis(body["messages"][-1]["content"]))
+    base = {"id": "fake", "created": int(time.time()), "model": body.get("model", "fake")}
+
+    if not body.get("stream"):
+        return {
+            **base,
+            "object": "chat.completion",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    async def chunks():
+        for i in range(0, len(content), 16):
+            chunk = {
+                **base,
+                "object": "chat.completion.chunk",
+                "choices": [{"index": 0, "delta": {"content": content[i:i + 16]}, "finish_reason": None}],
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(chunks(), media_type="text/event-stream")
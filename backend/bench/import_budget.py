@@ -0,0 +1,86 @@
+"""
+Import-time budget for the app.
+
+Imports app.main in fresh interpreters (keeping the fastest run), lists the
+slowest modules from `python -X importtime`, and exits non-zero if the import
+is over budget, eagerly pulls in an SDK that should only load at startup, or
+creates the SQLite database (stores open in the lifespan, not at import).
+
+    cd backend
+    python -m bench.import_budget --budget-ms 1200
+"""
+import argparse
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded in the background by the app's lifespan, never at import time
+LAZY_MODULES = ("openai", "ddgs", "httpx")
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| *(\S+)$")
+
+
+def measure() -> Tuple[float, Dict[str, Tuple[int, int]], List[str]]:
+    """One cold import: (total ms, {module: (self us, cumulative us)}, lazy things that got loaded).
+
+    Lazy things are SDK module names, plus "sqlite database" if the cache file was created.
+    """
+    db_dir = tempfile.mkdtemp(prefix="import-budget-")
+    db_path = os.path.join(db_dir, "cache.sqlite3")
+    probe = (
+        "import sys, time; start = time.perf_counter(); import app.main; "
+        "print((time.perf_counter() - start) * 1000); "
+        f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        env={**os.environ, "OPENROUTER_API_KEY": "", "CACHE_DB_PATH": db_path},
+    )
+    created = os.path.exists(db_path)
+    shutil.rmtree(db_dir, ignore_errors=True)
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            modules[match.group(3)] = (int(match.group(1)), int(match.group(2)))
+    total_ms, loaded = result.stdout.splitlines()[-2:]
+    lazy = [m for m in loaded.split(",") if m] + (["sqlite database"] if created else [])
+    return float(total_ms), modules, lazy
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Check the app's cold import time.")
+    parser.add_argument("--budget-ms", type=float, default=1200, help="max import time of app.main")
+    parser.add_argument("--runs", type=int, default=5, help="cold imports to run; the fastest counts")
+    parser.add_argument("--top", type=int, default=10, help="slowest modules to list")
+    args = parser.parse_args(argv)
+
+    runs = [measure() for _ in range(args.runs)]
+    total_ms, modules, loaded = min(runs, key=lambda run: run[0])
+
+    print(f"import app.main  {total_ms:8.1f} ms  (fastest of {args.runs}, budget {args.budget_ms:g} ms)")
+    print("slowest modules (self time):")
+    for name, (self_us, cumulative_us) in sorted(modules.items(), key=lambda item: -item[1][0])[:args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  {cumulative_us / 1000:8.1f} ms cumulative  {name}")
+
+    failed = False
+    if loaded:
+        print(f"FAIL: imported eagerly, should load lazily: {', '.join(loaded)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"FAIL: {total_ms:.1f} ms is over the {args.budget_ms:g} ms budget")
+        failed = True
+    if not failed:
+        print("OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+"""
+Offline load test for the API.
+
+Starts a fake OpenAI-compatible server and the real app (app.main:app) with
+the stub search provider, drives a configurable mix of cache-hit and
+cache-miss traffic, and reports throughput, latency percentiles and
+event-loop lag.
+
+    cd backend
+    python -m bench.run --concurrency 50 --requests 1000 --hit-ratio 0.8
+"""
+import argparse
+import asyncio
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_WORDS = """
+dog cat pet walking grooming food delivery meal kit fitness coach yoga tutor math
+language learning music guitar piano crypto wallet budget invoice payroll legal
+contract rental apartment parking car wash laundry plant garden recipe wine coffee
+travel hotel flight event ticket dating wedding baby sitter elder care therapy
+sleep meditation resume hiring freelance design logo podcast video editing drone
+farm solar battery recycling fashion thrift sneaker furniture moving storage
+""".split()
+
+
+def random_idea(rng: random.Random) -> Dict[str, str]:
+    """A fresh idea that won't hit any cache (or the near-duplicate index)."""
+    words = rng.sample(_WORDS, 8)
+    return {
+        "name": f"{words[0].title()}{words[1].title()} {rng.randrange(10 ** 6)}",
+        "description": f"{' '.join(words)} platform number {rng.randrange(10 ** 9)}",
+    }
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def parse_histogram(text: str, name: str) -> List[Tuple[float, float]]:
+    """(upper bound, cumulative count) pairs of an unlabeled Prometheus histogram."""
+    buckets = []
+    for match in re.finditer(rf'^{name}_bucket\{{le="([^"]+)"\}} (\S+)$', text, re.M):
+        bound = float("inf") if match.group(1) == "+Inf" else float(match.group(1))
+        buckets.append((bound, float(match.group(2))))
+    return buckets
+
+
+def histogram_quantile(before: List[Tuple[float, float]], after: List[Tuple[float, float]], q: float) -> Optional[float]:
+    """Upper bucket bound holding the q-quantile of observations made between two scrapes."""
+    previous = dict(before)
+    delta = [(bound, count - previous.get(bound, 0.0)) for bound, count in after]
+    if not delta or delta[-1][1] <= 0:
+        return None
+    target = q * delta[-1][1]
+    for bound, count in delta:
+        if count >= target:
+            return bound
+    return None
+
+
+def start_process(args: List[str], env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", *args],
+        cwd=BACKEND_DIR,
+        env={**os.environ, **env},
+    )
+
+
+async def wait_ready(url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+async def drive(args, base_url: str) -> Tuple[List[float], Dict[str, int], float]:
+    """Send the configured traffic; return latencies, status counts and wall time."""
+    rng = random.Random(args.seed)
+    hot = [random_idea(rng) for _ in range(args.hot_ideas)]
+    path = "/analyze-startup/stream" if args.stream else "/analyze-startup"
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        # Warm the hot set so it really is cache-hit traffic
+        await asyncio.gather(*(client.post(path, json=idea) for idea in hot))
+
+        latencies: List[float] = []
+        statuses: Dict[str, int] = {}
+        remaining = args.requests
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                idea = rng.choice(hot) if rng.random() < args.hit_ratio else random_idea(rng)
+                start = time.perf_counter()
+                try:
+                    response = await client.post(path, json=idea)
+                    await response.aread()
+                    status = str(response.status_code)
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                latencies.append(time.perf_counter() - start)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        return latencies, statuses, time.perf_counter() - start
+
+
+async def main_async(args):
+    llm_url = f"http://127.0.0.1:{args.llm_port}"
+    app_url = f"http://127.0.0.1:{args.port}"
+    cache_dir = tempfile.mkdtemp(prefix="roaster-bench-")
+    fake_env = {
+        "FAKE_SEARCH_LATENCY_MS": str(args.search_latency_ms),
+        "FAKE_SEARCH_ERROR_RATE": str(args.search_error_rate),
+        "FAKE_LLM_LATENCY_MS": str(args.llm_latency_ms),
+        "FAKE_LLM_ERROR_RATE": str(args.llm_error_rate),
+    }
+    app_env = {
+        **fake_env,
+        "OPENROUTER_API_KEY": "bench",
+        "OPENROUTER_BASE_URL": f"{llm_url}/v1",
+        "SEARCH_PROVIDER": "bench.fakes:search",
+        "CACHE_DB_PATH": os.path.join(cache_dir, "cache.sqlite3") if args.shared_cache else "",
+        "LOG_LEVEL": "WARNING",
+        # The fakes don't throttle, so measure the app rather than the limiter
+        "SEARCH_RATE_LIMIT": "0",
+        "LLM_RATE_LIMIT": "0",
+        # Keep the bench's random ideas and lock files away from real runs on this host
+        "WARM_ON_STARTUP": "0",
+        "POPULAR_IDEAS_PATH": os.path.join(cache_dir, "popular.json"),
+        "WARM_LOCK_PATH": os.path.join(cache_dir, "warm.lock"),
+        "RATE_LIMIT_DIR": cache_dir,
+    }
+
+    processes = [
+        start_process(["bench.fakes:app", "--port", str(args.llm_port), "--log-level", "warning"], fake_env),
+        start_process([
+            "app.main:app", "--port", str(args.port), "--workers", str(args.workers),
+            "--loop", "asyncio", "--log-level", "warning", "--no-access-log",
+        ], app_env),
+    ]
+    try:
+        await wait_ready(f"{llm_url}/docs")
+        await wait_ready(f"{app_url}/health")
+
+        async with httpx.AsyncClient(base_url=app_url) as client:
+            before = (await client.get("/metrics")).text
+        latencies, statuses, elapsed = await drive(args, app_url)
+        async with httpx.AsyncClient(base_url=app_url) as client:
+            after = (await client.get("/metrics")).text
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    latencies.sort()
+    lag_before = parse_histogram(before, "event_loop_lag_seconds")
+    lag_after = parse_histogram(after, "event_loop_lag_seconds")
+
+    print(f"\nrequests      {len(latencies)} in {elapsed:.2f}s  ({len(latencies) / elapsed:.1f} req/s)")
+    print(f"concurrency   {args.concurrency}  workers {args.workers}  hit ratio {args.hit_ratio:.0%}")
+    print(f"status        {statuses}")
+    for q in (0.5, 0.95, 0.99):
+        print(f"latency p{int(q * 100):<3}   {percentile(latencies, q) * 1000:8.1f} ms")
+    print(f"latency max   {latencies[-1] * 1000 if latencies else 0:8.1f} ms")
+    for q in (0.5, 0.99):
+        bound = histogram_quantile(lag_before, lag_after, q)
+        label = "n/a" if bound is None else f"<= {bound * 1000:g} ms"
+        print(f"loop lag p{int(q * 100):<3}  {label}")
+    if args.workers > 1:
+        print("(loop lag is from whichever worker answered /metrics)")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline load test against fake upstreams.")
+    parser.add_argument("--requests", type=int, default=500, help="total measured requests")
+    parser.add_argument("--concurrency", type=int, default=20, help="concurrent client connections")
+    parser.add_argument("--hit-ratio", type=float, default=0.5, help="share of requests for already-cached ideas")
+    parser.add_argument("--hot-ideas", type=int, default=20, help="distinct ideas in the cache-hit set")
+    parser.add_argument("--stream", action="store_true", help="use /analyze-startup/stream")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the app")
+    parser.add_argument("--shared-cache", action="store_true", help="enable the SQLite L2 cache tier")
+    parser.add_argument("--search-latency-ms", type=float, default=800)
+    parser.add_argument("--search-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=2000)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--timeout", type=float, default=60, help="client timeout per request (s)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--llm-port", type=int, default=8766)
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(main_async(parse_args()))
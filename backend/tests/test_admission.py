@@ -0,0 +1,120 @@
+"""Tests for admission control in app.admission."""
+import asyncio
+
+import pytest
+
+from app.admission import AdmissionController, Overloaded
+
+
+async def until(condition):
+    while not condition():
+        await asyncio.sleep(0)
+
+
+def test_release_hands_the_slot_to_the_next_waiter():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=4, queue_timeout=5)
+        release = await controller.acquire()
+        waiter = asyncio.create_task(controller.acquire())
+        await until(lambda: controller.queued == 1)
+
+        release()
+        next_release = await waiter
+        assert controller.active == 1 and controller.queued == 0
+        next_release()
+        return controller.active
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_slot_handed_over_as_the_waiter_times_out_is_passed_on(monkeypatch):
+    async def timeout_after_handoff(fut, timeout):
+        # The timer fires in the same loop iteration as the handoff
+        await fut
+        raise asyncio.TimeoutError
+
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=4, queue_timeout=5)
+        release = await controller.acquire()
+        with monkeypatch.context() as patch:
+            patch.setattr(asyncio, "wait_for", timeout_after_handoff)
+            leaving = asyncio.create_task(controller.acquire())
+            await until(lambda: controller.queued == 1)
+        staying = asyncio.create_task(controller.acquire())
+        await until(lambda: controller.queued == 2)
+
+        release()
+        with pytest.raises(Overloaded):
+            await leaving
+        staying_release = await staying
+        assert controller.active == 1 and controller.queued == 0
+        staying_release()
+        return controller.active
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=4, queue_timeout=5)
+        release = await controller.acquire()
+        waiter = asyncio.create_task(controller.acquire())
+        await until(lambda: controller.queued == 1)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert controller.queued == 0
+        release()
+        return controller.active
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_queue_timeout_is_shed_with_retry_after():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=4, queue_timeout=0.01)
+        await controller.acquire()
+        with pytest.raises(Overloaded) as info:
+            await controller.acquire()
+        return controller, info.value
+
+    controller, error = asyncio.run(scenario())
+    assert str(error) == "queue timeout" and error.retry_after >= 1
+    assert controller.queued == 0 and controller.active == 1 and controller.rejected == 1
+
+
+def test_full_queue_is_shed_immediately():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=5)
+        release = await controller.acquire()
+        waiter = asyncio.create_task(controller.acquire())
+        await until(lambda: controller.queued == 1)
+        with pytest.raises(Overloaded) as info:
+            await controller.acquire()
+        release()
+        (await waiter)()
+        return controller, info.value
+
+    controller, error = asyncio.run(scenario())
+    assert str(error) == "queue full" and error.retry_after >= 1
+    assert controller.rejected == 1 and controller.active == 0
+
+
+def test_release_is_idempotent():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=4, queue_timeout=5)
+        release = await controller.acquire()
+        waiters = [asyncio.create_task(controller.acquire()) for _ in range(2)]
+        await until(lambda: controller.queued == 2)
+
+        # Called twice (as the stream endpoint does): only one waiter may get in
+        release()
+        release()
+        await asyncio.sleep(0.01)
+        admitted = [task for task in waiters if task.done()]
+        assert len(admitted) == 1 and controller.active == 1
+        for task in waiters:
+            (await task)()
+        return controller.active
+
+    assert asyncio.run(scenario()) == 0
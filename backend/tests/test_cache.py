@@ -0,0 +1,49 @@
+"""Tests for request coalescing in app.cache."""
+import asyncio
+import contextlib
+
+from app.cache import SingleFlight
+
+
+def test_caller_after_last_waiter_left_starts_a_new_flight():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def slow():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                # Cleanup keeps the task alive for a while after cancel()
+                await asyncio.sleep(0.05)
+                raise
+
+        async def fast():
+            return "fresh"
+
+        first = asyncio.ensure_future(flight.do("idea", slow))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await first
+        # The abandoned flight is still shutting down; this caller must not join it
+        return await flight.do("idea", fast)
+
+    assert asyncio.run(scenario()) == "fresh"
+
+
+def test_concurrent_callers_share_one_call():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return len(calls)
+
+        results = await asyncio.gather(*(flight.do("idea", work) for _ in range(5)))
+        return results, len(flight)
+
+    results, in_flight = asyncio.run(scenario())
+    assert results == [1] * 5
+    assert in_flight == 0
@@ -0,0 +1,8 @@
+"""Tests that importing the app stays cheap (see bench/import_budget.py)."""
+from bench.import_budget import measure
+
+
+def test_import_loads_no_sdks_and_opens_no_database():
+    total_ms, modules, lazy = measure()
+    assert "app.main" in modules
+    assert lazy == []
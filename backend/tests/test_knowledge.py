@@ -0,0 +1,43 @@
+"""Tests for the local competitor index in app.knowledge."""
+from app.knowledge import CompetitorIndex
+from app.search_hits import SearchHit
+
+MATH_IDEA = "AI tutor for high school math students"
+MATH_HITS = [
+    SearchHit("Khanmigo - AI math tutor", "https://khanmigo.ai/", "khanmigo.ai",
+              "A personal AI tutor for high school students working through math."),
+    SearchHit("Photomath", "https://photomath.com/", "photomath.com",
+              "Scan a math problem and get step-by-step help. Loved by high school students."),
+    SearchHit("Mathway AI tutor", "https://mathway.com/", "mathway.com",
+              "Math solver and AI tutor from algebra to calculus for school students."),
+    SearchHit("Brainly math homework", "https://brainly.com/", "brainly.com",
+              "High school students ask math questions, an AI tutor answers."),
+    SearchHit("Socratic by Google", "https://socratic.org/", "socratic.org",
+              "AI homework help for high school students: math explained by a tutor."),
+    SearchHit("Wolfram Alpha for students", "https://wolframalpha.com/", "wolframalpha.com",
+              "Step-by-step math for high school and college students."),
+]
+
+
+def make_index(tmp_path):
+    index = CompetitorIndex(str(tmp_path / "knowledge.sqlite3"))
+    index.add_hits(MATH_HITS, MATH_IDEA)
+    return index
+
+
+def test_rewording_of_an_indexed_idea_is_answered_locally(tmp_path):
+    hits = make_index(tmp_path).lookup("Tutorly", "AI math tutor for high school students")
+    assert hits is not None
+    assert {hit.title for hit in hits} >= {"Khanmigo - AI math tutor", "Photomath"}
+
+
+def test_similar_wording_for_a_different_subject_is_not(tmp_path):
+    index = make_index(tmp_path)
+    assert index.lookup("ChemBuddy", "AI tutor for high school chemistry students") is None
+    assert index.lookup("HistoryHero", "Online tutor for high school history students") is None
+
+
+def test_earlier_idea_text_does_not_count_as_coverage(tmp_path):
+    index = make_index(tmp_path)
+    index.add_competitors(["Rover", "Wag", "Fetch", "Barkly", "Petco"], "dog walking for busy pet owners")
+    assert index.lookup("Walkies", "dog walking for busy pet owners") is None
@@ -0,0 +1,107 @@
+"""Tests for hedging, failover and circuit breaking in app.llm_router."""
+import asyncio
+
+import pytest
+
+from app import llm_router
+from app.llm_router import ModelRouter
+
+
+@pytest.fixture(autouse=True)
+def fast_settings(monkeypatch):
+    monkeypatch.setattr(llm_router, "LLM_HEDGE_DELAY", 0.05)
+    monkeypatch.setattr(llm_router, "LLM_HEDGE_MIN_DELAY", 0.01)
+    monkeypatch.setattr(llm_router, "LLM_HEDGE_MAX_RATIO", 1.0)
+    monkeypatch.setattr(llm_router, "LLM_BREAKER_FAILURES", 3)
+    monkeypatch.setattr(llm_router, "LLM_BREAKER_COOLDOWN", 0.05)
+
+
+def fake_models(delays, cancelled):
+    """attempt() that answers with the model name after its delay, noting cancellations."""
+    async def attempt(model):
+        try:
+            await asyncio.sleep(delays[model])
+        except asyncio.CancelledError:
+            cancelled.append(model)
+            raise
+        return model
+    return attempt
+
+
+@pytest.mark.parametrize("delays, winner, loser", [
+    ({"a": 10, "b": 0.01}, "b", "a"),  # the hedge wins
+    ({"a": 0.15, "b": 10}, "a", "b"),  # the slow primary still wins
+])
+def test_slow_call_is_hedged_and_loser_cancelled_without_a_sample(delays, winner, loser):
+    router = ModelRouter(["a", "b"])
+    cancelled = []
+
+    assert asyncio.run(router.call(fake_models(delays, cancelled))) == winner
+
+    backends = {b.model: b for b in router.backends}
+    assert router.hedges == 1
+    assert cancelled == [loser]
+    assert len(backends[winner]._samples) == 1
+    assert backends[loser].latency is None and not backends[loser]._samples
+    assert not backends[loser].failures
+
+
+def test_failure_fails_over_to_the_next_model():
+    router = ModelRouter(["a", "b"])
+
+    async def attempt(model):
+        if model == "a":
+            raise RuntimeError("bad output")
+        return model
+
+    assert asyncio.run(router.call(attempt)) == "b"
+    a = router.backends[0]
+    assert a.failures == 1 and a.error_rate > 0
+    assert router.hedges == 0
+
+
+def test_breaker_opens_then_allows_exactly_one_trial(monkeypatch):
+    monkeypatch.setattr(llm_router, "LLM_HEDGE_MAX_RATIO", 0.0)  # no hedges, only failover
+    router = ModelRouter(["a", "b"])
+    a = router.backends[0]
+    calls = []
+
+    async def scenario():
+        async def failing(model):
+            calls.append(model)
+            if model == "a":
+                raise RuntimeError("down")
+            return model
+
+        for _ in range(llm_router.LLM_BREAKER_FAILURES):
+            assert await router.call(failing) == "b"
+        assert a.circuit_open
+        assert [b.model for b in router.ranked()] == ["b"]
+
+        await asyncio.sleep(llm_router.LLM_BREAKER_COOLDOWN + 0.01)
+        # Cooldown over: "a" is half-open (and untimed, so ranked first)
+        assert [b.model for b in router.ranked()] == ["a", "b"]
+
+        # Half-open: the first call to reach "a" is the only trial until it finishes
+        release = asyncio.Event()
+        calls.clear()
+
+        async def recovering(model):
+            calls.append(model)
+            if model == "a":
+                await release.wait()
+            return model
+
+        trial = asyncio.create_task(router.call(recovering))
+        while not calls:
+            await asyncio.sleep(0)
+        assert calls == ["a"]
+        assert [b.model for b in router.ranked()] == ["b"]
+        assert await router.call(recovering) == "b"
+        assert calls == ["a", "b"]
+
+        release.set()
+        return await trial
+
+    assert asyncio.run(scenario()) == "a"
+    assert not a.circuit_open
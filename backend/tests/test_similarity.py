@@ -0,0 +1,28 @@
+"""Tests for near-duplicate description matching in app.similarity."""
+from app.similarity import SimilarityIndex
+
+MATH_IDEA = "AI tutor for high school math students"
+
+
+def make_index():
+    index = SimilarityIndex()
+    index.add(MATH_IDEA, "math")
+    index.add("Marketplace for renting camping gear to weekend hikers", "gear")
+    return index
+
+
+def test_paraphrase_reuses_the_search():
+    found = make_index().find("Tutoring high school math students with AI")
+    assert found is not None and found[0] == "math"
+
+
+def test_one_changed_word_is_a_different_idea():
+    index = make_index()
+    assert index.find("AI tutor for high school chemistry students") is None
+    assert index.find("Marketplace for renting camping tents to weekend hikers") is None
+
+
+def test_short_descriptions_never_match():
+    index = SimilarityIndex()
+    index.add("dog walking", "dogs")
+    assert index.find("dog walking") is None
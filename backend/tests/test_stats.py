@@ -0,0 +1,44 @@
+"""Tests for the roast statistics in app.stats."""
+from collections import Counter
+
+from app.models import StartupAnalysis
+from app.stats import STATS_TOP_COMPETITORS, RoastStats
+
+
+def roast(verdict, score, competitors):
+    return StartupAnalysis(verdict=verdict, roast="Seen it.", score=score, name_rating="Forgettable", competitors=competitors)
+
+
+def record(stats, counts, found):
+    for name, count in counts.items():
+        for _ in range(count):
+            stats.record(roast("trash", 2, [name]))
+        found[name] += count
+
+
+def test_summary_merges_pending_roasts_into_the_shared_top_list(tmp_path, monkeypatch):
+    stats = RoastStats(capacity=100)
+    found = Counter()
+    # Merged base: c0..c19 with counts 60, 57, ..., 3
+    record(stats, {f"c{i}": 60 - 3 * i for i in range(20)}, found)
+    stats.merge_into(str(tmp_path / "stats.db"))
+    stats.record(roast("gold", 9, []))
+
+    # Pending: a new leader, an outsider climbing into the top list and a newcomer just missing it
+    record(stats, {"c3": 50, "c15": 35, "fresh": 31, "late": 1}, found)
+
+    expected = [name for name, _ in found.most_common(STATS_TOP_COMPETITORS)]
+    counts = [count for _, count in found.most_common(STATS_TOP_COMPETITORS + 1)]
+    assert len(set(counts)) == len(counts)
+
+    # Reads look up pending names only; they never walk the whole shared sketch
+    with monkeypatch.context() as patch:
+        patch.setattr(stats._base.competitors, "items", None)
+        summary = stats.summary()
+    assert summary.top_competitors_found == expected
+    assert summary.total_roasts == sum(found.values()) + 1
+    assert (summary.trash_count, summary.gold_count) == (sum(found.values()), 1)
+
+    # Merging the pending counts gives the same answer
+    stats.merge_into(str(tmp_path / "stats.db"))
+    assert stats.summary() == summary
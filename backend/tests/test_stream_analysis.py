@@ -0,0 +1,58 @@
+"""Tests for StartupRoaster.stream_analysis."""
+import asyncio
+import json
+from types import SimpleNamespace
+
+from app.cache import response_cache
+from app.ratelimit import llm_limiter
+from app.roaster import StartupRoaster
+
+ANALYSIS = {
+    "verdict": "trash",
+    "roast": "A dating app for houseplants. The ferns have standards.",
+    "competitors": [],
+    "score": 2,
+    "advice": "Water your ideas before pitching them.",
+}
+
+
+def chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+async def slow_stream(text, size=8):
+    for start in range(0, len(text), size):
+        await asyncio.sleep(0.001)
+        yield chunk(text[start:start + size])
+
+
+def test_stream_is_cached_after_the_client_disconnects(monkeypatch):
+    monkeypatch.setattr(llm_limiter, "rate", 0)
+
+    async def scenario():
+        roaster = StartupRoaster("test-key", search_provider=object())
+
+        async def no_competitors(name, description):
+            return [], ""
+
+        async def create_completion(**kwargs):
+            return slow_stream(json.dumps(ANALYSIS))
+
+        roaster.search_competitors = no_competitors
+        roaster._create_completion = create_completion
+        try:
+            events = roaster.stream_analysis("Plantr", "Tinder, but for houseplants", check_cache=False)
+            async for event, _ in events:
+                if event == "delta":
+                    break
+            # The client goes away after the first delta
+            await events.aclose()
+            assert response_cache.get("Plantr:Tinder, but for houseplants") is None
+            await asyncio.gather(*roaster._detached)
+            return response_cache.get("Plantr:Tinder, but for houseplants")
+        finally:
+            await roaster.close()
+
+    cached = asyncio.run(scenario())
+    assert cached is not None
+    assert (cached.verdict, cached.roast, cached.advice) == (ANALYSIS["verdict"], ANALYSIS["roast"], ANALYSIS["advice"])
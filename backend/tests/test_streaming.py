@@ -0,0 +1,41 @@
+"""Tests for the incremental JSON field parser in app.streaming."""
+import json
+
+import pytest
+
+from app.streaming import JSONFieldStreamer
+
+FIELDS = ("verdict", "summary")
+
+IDEA = {
+    "details": {"summary": "nested, not top-level", "verdict": ["nor", "this"]},
+    "score": 3,
+    "competitors": [{"verdict": "{\"not\": [top-level]}"}],
+    "verdict": 'Quotes " and \\ backslashes / slashes\n\ttabs\r\b\f '
+               "and emoji 🚀🔥 in a \"trash\" idea: {not: json}, [ok]",
+    "summary": "Caf\u00e9 for 🎻 players, 𝄞 notation, nothing else",
+    "summary ": "similar key, different field",
+}
+DOCUMENTS = [json.dumps(IDEA), json.dumps(IDEA, ensure_ascii=False, indent=2)]
+
+
+def streamed_fields(document: str, chunk_size: int) -> dict:
+    streamer = JSONFieldStreamer(FIELDS)
+    fields = {}
+    for start in range(0, len(document), chunk_size):
+        for field, delta in streamer.feed(document[start:start + chunk_size]):
+            fields[field] = fields.get(field, "") + delta
+    return fields
+
+
+@pytest.mark.parametrize("document", DOCUMENTS, ids=["ascii", "raw"])
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 6, 7, 13, 10_000])
+def test_streamed_fields_match_json_loads(document, chunk_size):
+    parsed = json.loads(document)
+    expected = {field: parsed[field] for field in FIELDS}
+
+    assert streamed_fields(document, chunk_size) == expected
+
+
+def test_escaped_document_has_surrogate_pairs():
+    assert "\\ud83d\\ude80" in DOCUMENTS[0] and "\\ud834\\udd1e" in DOCUMENTS[0]